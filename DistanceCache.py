@@ -0,0 +1,261 @@
+import hashlib
+import struct
+import time
+import zlib
+from collections import OrderedDict
+from multiprocessing import shared_memory
+
+from Quoridor import BOARD_SIZE, get_tables
+
+# Layouts kept by a DistanceCache by default
+CAPACITY = 65536
+# Bytes every shared cache starts with: a magic string, the number of buckets, board size and player count
+MAGIC = b"QDST"
+HEADER_FORMAT = struct.Struct("<4sIII")
+# Entries per bucket of a shared cache, the least recently used one is replaced
+WAYS = 4
+# Front of every shared entry: layout hash (0 marks an empty entry), last use in nanoseconds,
+# CRC-32 of the layout and fields. The fence masks and every player's distances follow
+ENTRY_FORMAT = struct.Struct("<QQI")
+# One 64-bit word of an entry, for reading its hash or writing its last use on their own
+WORD_FORMAT = struct.Struct("<Q")
+# Memory given to a shared cache by default
+SHARED_BYTES = 16 * 1024 * 1024
+
+
+def layout_hash(masks):
+    """Hashes a fence layout to a nonzero 64-bit value, the same in every process
+    Parameters: Bytes of the horizontal fence mask followed by the vertical fence mask
+    Returns: 64-bit integer
+    Note: Python's own hash of an integer is its value modulo a 61-bit prime, which folds the high
+    fence bits onto the low ones, so the bytes are hashed with BLAKE2 instead
+    """
+    return int.from_bytes(hashlib.blake2b(masks, digest_size=8).digest(), "little") or 1
+
+
+class DistanceCache:
+    """Bounded cache of every player's distance field for each fence layout, in one process
+    Distances only depend on the fences, so one entry serves every pawn position and player to move.
+    Once full, the least recently used layout is dropped
+    """
+    def __init__(self, capacity=CAPACITY):
+        """Initializes a DistanceCache
+        Parameters: Maximum number of layouts kept
+        Returns: None
+        """
+        self._capacity = capacity
+        self._entries = OrderedDict()
+        self._probes = 0
+        self._hits = 0
+        self._evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def probe(self, h_fences, v_fences):
+        """Looks up a fence layout
+        Parameters: Horizontal and vertical fence masks
+        Returns: Tuple of bytes, the distance field of each player in turn order, or None if the layout isn't stored
+        """
+        self._probes += 1
+        key = (h_fences, v_fences)
+        fields = self._entries.get(key)
+        if fields is None:
+            return None
+        self._hits += 1
+        self._entries.move_to_end(key)
+        return fields
+
+    def store(self, h_fences, v_fences, fields):
+        """Stores the distance fields of a fence layout
+        Parameters: Horizontal and vertical fence masks, tuple of bytes of each player's distances
+        Returns: None
+        """
+        key = (h_fences, v_fences)
+        if key in self._entries:
+            self._entries.move_to_end(key)
+        elif len(self._entries) >= self._capacity:
+            self._entries.popitem(last=False)
+            self._evictions += 1
+        self._entries[key] = fields
+
+    def clear(self):
+        """Empties the cache and its statistics
+        Parameters: None
+        Returns: None
+        """
+        self._entries.clear()
+        self._probes = 0
+        self._hits = 0
+        self._evictions = 0
+
+    def get_hit_rate(self):
+        """Returns the fraction of probes that found their layout
+        Parameters: None
+        Returns: Hits divided by probes, or 0.0 before the first probe
+        """
+        if self._probes == 0:
+            return 0.0
+        return self._hits / self._probes
+
+    def get_stats(self):
+        """Returns statistics about the cache
+        Parameters: None
+        Returns: Dict with the layouts stored, capacity, probes, hits, hit rate and evictions
+        """
+        return {"entries": len(self._entries), "capacity": self._capacity, "probes": self._probes,
+                "hits": self._hits, "hit_rate": self.get_hit_rate(), "evictions": self._evictions}
+
+
+class SharedDistanceCache:
+    """Distance cache held in a multiprocessing.shared_memory segment, so every process on a host shares it
+    The segment is a header followed by buckets of WAYS fixed-size entries. A layout can only be stored in
+    the bucket its hash picks, replacing the least recently used entry there, so the memory cap is exact.
+    Entries are written without locks, and a reader only accepts an entry whose hash, fence masks and
+    checksum all match, so an entry torn by a concurrent write reads as a miss
+    Hit statistics are counted per process, and MCTSPlayer.get_stats adds up the counts of its workers
+    """
+    def __init__(self, name=None, memory_bytes=SHARED_BYTES, size=BOARD_SIZE, players=2):
+        """Initializes a SharedDistanceCache, creating a new segment or attaching to an existing one
+        Parameters: Name of the segment to attach to (None creates one), and for a new segment the bytes
+        it may use, board size and player count of the games it serves
+        Returns: None
+        Raises: ValueError if the named segment isn't a distance cache
+        Note: The number of buckets is rounded down to a power of two
+        """
+        if name is None:
+            tables = get_tables(size, players)
+            entry_size = ENTRY_FORMAT.size + 2 * tables.mask_bytes + players * tables.squares
+            buckets = 1
+            while buckets * 2 * WAYS * entry_size + HEADER_FORMAT.size <= memory_bytes:
+                buckets *= 2
+            self._memory = shared_memory.SharedMemory(create=True, size=HEADER_FORMAT.size + buckets * WAYS * entry_size)
+            self._memory.buf[:HEADER_FORMAT.size] = HEADER_FORMAT.pack(MAGIC, buckets, size, players)
+            self._owner = True
+        else:
+            self._memory = shared_memory.SharedMemory(name=name)
+            self._owner = False
+            magic, buckets, size, players = HEADER_FORMAT.unpack_from(self._memory.buf)
+            if magic != MAGIC:
+                self._memory.close()
+                raise ValueError("Not a shared distance cache: " + str(name))
+            tables = get_tables(size, players)
+        self._buffer = self._memory.buf
+        self._mask = buckets - 1
+        self._squares = tables.squares
+        self._players = players
+        self._mask_bytes = tables.mask_bytes
+        self._entry_size = ENTRY_FORMAT.size + 2 * tables.mask_bytes + players * tables.squares
+        self._probes = 0
+        self._hits = 0
+        self._stores = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def get_name(self):
+        """Returns the name other processes attach to the segment with
+        Parameters: None
+        Returns: String name of the shared memory segment
+        """
+        return self._memory.name
+
+    def entry_offset(self, key, way):
+        """Finds where an entry of a bucket starts in the segment
+        Parameters: Layout hash, entry number within the bucket
+        Returns: Byte offset of the entry
+        """
+        return HEADER_FORMAT.size + ((key & self._mask) * WAYS + way) * self._entry_size
+
+    def probe(self, h_fences, v_fences):
+        """Looks up a fence layout
+        Parameters: Horizontal and vertical fence masks
+        Returns: Tuple of bytes, the distance field of each player in turn order, or None if the layout isn't stored
+        """
+        self._probes += 1
+        masks = h_fences.to_bytes(self._mask_bytes, "little") + v_fences.to_bytes(self._mask_bytes, "little")
+        key = layout_hash(masks)
+        for way in range(WAYS):
+            offset = self.entry_offset(key, way)
+            if WORD_FORMAT.unpack_from(self._buffer, offset)[0] != key:
+                continue
+            entry = bytes(self._buffer[offset:offset + self._entry_size])
+            stored, stamp, checksum = ENTRY_FORMAT.unpack_from(entry)
+            payload = entry[ENTRY_FORMAT.size:]
+            if stored != key or payload[:len(masks)] != masks or zlib.crc32(payload) != checksum:
+                continue
+            WORD_FORMAT.pack_into(self._buffer, offset + 8, time.monotonic_ns())
+            self._hits += 1
+            fields = payload[len(masks):]
+            return tuple(fields[index * self._squares:(index + 1) * self._squares] for index in range(self._players))
+        return None
+
+    def store(self, h_fences, v_fences, fields):
+        """Stores the distance fields of a fence layout
+        Parameters: Horizontal and vertical fence masks, tuple of bytes of each player's distances
+        Returns: None
+        """
+        masks = h_fences.to_bytes(self._mask_bytes, "little") + v_fences.to_bytes(self._mask_bytes, "little")
+        key = layout_hash(masks)
+        payload = masks + b"".join(fields)
+        # Reuses the layout's own entry or an empty one, otherwise replaces the least recently used
+        target = None
+        oldest = None
+        for way in range(WAYS):
+            offset = self.entry_offset(key, way)
+            stored, stamp, checksum = ENTRY_FORMAT.unpack_from(self._buffer, offset)
+            if stored == key or stored == 0:
+                target = offset
+                break
+            if oldest is None or stamp < oldest:
+                target = offset
+                oldest = stamp
+        self._buffer[target:target + self._entry_size] = \
+            ENTRY_FORMAT.pack(key, time.monotonic_ns(), zlib.crc32(payload)) + payload
+        self._stores += 1
+
+    def get_hit_rate(self):
+        """Returns the fraction of this process's probes that found their layout
+        Parameters: None
+        Returns: Hits divided by probes, or 0.0 before the first probe
+        """
+        if self._probes == 0:
+            return 0.0
+        return self._hits / self._probes
+
+    def get_counts(self):
+        """Returns this process's probe counts, without the scan of the segment get_stats does
+        Parameters: None
+        Returns: Tuple of (probes, hits)
+        """
+        return self._probes, self._hits
+
+    def get_stats(self):
+        """Returns statistics about the cache
+        Parameters: None
+        Returns: Dict with the layouts stored by every process, capacity, and this process's probes,
+        hits, hit rate and stores
+        """
+        entries = 0
+        for index in range((self._mask + 1) * WAYS):
+            if WORD_FORMAT.unpack_from(self._buffer, HEADER_FORMAT.size + index * self._entry_size)[0]:
+                entries += 1
+        return {"entries": entries, "capacity": (self._mask + 1) * WAYS, "probes": self._probes,
+                "hits": self._hits, "hit_rate": self.get_hit_rate(), "stores": self._stores}
+
+    def close(self):
+        """Detaches from the segment, and removes it if this cache created it
+        Parameters: None
+        Returns: None
+        """
+        if self._memory is None:
+            return
+        self._buffer.release()
+        self._buffer = None
+        self._memory.close()
+        if self._owner:
+            self._memory.unlink()
+        self._memory = None
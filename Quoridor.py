@@ -1,30 +1,562 @@
+import heapq
+import random
+import struct
+from enum import IntEnum
+
+# Number of squares along one side of the pawn board
+BOARD_SIZE = 9
+# Number of fence lines along one side of the fence board (one more than the squares)
+FENCE_SIZE = BOARD_SIZE + 1
+# Number of bits used to store one pawn square inside the packed pawn state
+PAWN_BITS = 8
+PAWN_MASK = (1 << PAWN_BITS) - 1
+# Number of fences each player starts with, in the two and four player games
+STARTING_FENCES = 10
+FOUR_PLAYER_FENCES = 5
+# Smallest and largest board sides supported, the largest keeping every square within PAWN_BITS
+MIN_BOARD_SIZE = 3
+MAX_BOARD_SIZE = 15
+# Row each player's pawn has to reach to win in the standard game, in turn order
+GOAL_ROWS = (BOARD_SIZE - 1, 0)
+# Player numbers as they are spelled out in messages
+PLAYER_WORDS = ("One", "Two", "Three", "Four")
+# Distance recorded for squares that have no path to a goal row
+UNREACHABLE = 255
+# Seed of the Zobrist keys, fixed so keys match across processes
+ZOBRIST_SEED = 20210829
+# Movement directions used by the neighbour tables, and the bit marking each one as open
+UP, DOWN, LEFT, RIGHT = 0, 1, 2, 3
+DIRECTION_BITS = (1, 2, 4, 8)
+ALL_DIRECTIONS = 15
+# The two directions at a right angle to each direction, used for diagonal side steps
+PERPENDICULAR = ((LEFT, RIGHT), (LEFT, RIGHT), (UP, DOWN), (UP, DOWN))
+
+
+class MoveError(IntEnum):
+    """Reasons a move can be rejected, returned by the silent rule checks
+    MoveError.OK is zero, so any other code is truthy
+    """
+    OK = 0
+    GAME_OVER = 1
+    NOT_YOUR_TURN = 2
+    OUT_OF_BOUNDS = 3
+    FENCE_BLOCKED = 4
+    OVERLAP = 5
+    INVALID_DIAGONAL = 6
+    JUMP_BLOCKED = 7
+    INVALID_DISTANCE = 8
+    NO_FENCES = 9
+    INVALID_DIRECTION = 10
+    FENCE_OUT_OF_BOUNDS = 11
+    FENCE_OVERLAP = 12
+    PATH_BLOCKED = 13
+
+
+# Message printed for each rejection reason, {player} is replaced with the name of the player to move
+ERROR_MESSAGES = {
+    MoveError.GAME_OVER: "The game is over!",
+    MoveError.NOT_YOUR_TURN: "It's not your turn! It's {player}'s turn!",
+    MoveError.OUT_OF_BOUNDS: "Move blocked by a fence!",
+    MoveError.FENCE_BLOCKED: "Move blocked by fence!",
+    MoveError.OVERLAP: "Move blocked by a pawn!",
+    MoveError.INVALID_DIAGONAL: "Can't move diagonally!",
+    MoveError.JUMP_BLOCKED: "Jump blocked by fence!",
+    MoveError.INVALID_DISTANCE: "Invalid number of spaces!",
+    MoveError.NO_FENCES: "You don't have any fences to place!",
+    MoveError.INVALID_DIRECTION: "Fences must be placed horizontally or vertically!",
+    MoveError.FENCE_OUT_OF_BOUNDS: "Cannot place the fence outside the game board!",
+    MoveError.FENCE_OVERLAP: "Cannot place overlapping fences",
+    MoveError.PATH_BLOCKED: "Cannot block a player's path to the goal!",
+}
+
+
+def build_edge_tables(size):
+    """Precomputes the fence bits bordering each square of the board
+    Parameters: The number of squares along one side of the board
+    Returns: Lists holding the fence bit above, below, left of, and right of each square
+    Note: Squares are indexed as row * size + col, fence bits as row * (size + 1) + col
+    Above/below bits belong to the horizontal fence mask, left/right bits to the vertical fence mask
+    """
+    fence_size = size + 1
+    up, down, left, right = [], [], [], []
+    for row in range(size):
+        for col in range(size):
+            up.append(1 << (row * fence_size + col))
+            down.append(1 << ((row + 1) * fence_size + col))
+            left.append(1 << (row * fence_size + col))
+            right.append(1 << (row * fence_size + col + 1))
+    return up, down, left, right
+
+
+def build_neighbour_table(size):
+    """Precomputes the neighbouring square in each direction for every square of the board
+    Parameters: The number of squares along one side of the board
+    Returns: List holding a (up, down, left, right) tuple of squares for each square, -1 if off the board
+    """
+    neighbours = []
+    for row in range(size):
+        for col in range(size):
+            square = row * size + col
+            neighbours.append((square - size if row > 0 else -1,
+                               square + size if row < size - 1 else -1,
+                               square - 1 if col > 0 else -1,
+                               square + 1 if col < size - 1 else -1))
+    return neighbours
+
+
+def build_jump_table(neighbours):
+    """Precomputes the squares involved in a move in each direction from every square
+    Parameters: Neighbour table from build_neighbour_table
+    Returns: List holding, for each square, a tuple per direction of
+    (adjacent square, straight jump landing, first diagonal landing, second diagonal landing)
+    Note: Squares off the board are -1. Whether each square can actually be reached depends on
+    the fences and pawns, which are checked against the open-edge table during move generation
+    """
+    jumps = []
+    for square in range(len(neighbours)):
+        entry = []
+        for direction in (UP, DOWN, LEFT, RIGHT):
+            middle = neighbours[square][direction]
+            if middle == -1:
+                entry.append((-1, -1, -1, -1))
+                continue
+            side_a, side_b = PERPENDICULAR[direction]
+            entry.append((middle, neighbours[middle][direction],
+                          neighbours[middle][side_a], neighbours[middle][side_b]))
+        jumps.append(tuple(entry))
+    return jumps
+
+
+def build_fence_slots(size):
+    """Lists every cell a player may place a fence in
+    Parameters: The number of squares along one side of the board
+    Returns: List of (direction, fence bit, (x, y) position, first square, second square) tuples,
+    horizontal slots first
+    Note: Positions use the (x, y) notation accepted by place_fence. The two squares are the ones
+    the fence separates, above/below for horizontal fences and left/right for vertical fences
+    """
+    fence_size = size + 1
+    slots = []
+    for row in range(1, size):
+        for col in range(size):
+            square = row * size + col
+            slots.append(("h", 1 << (row * fence_size + col), (col, row), square - size, square))
+    for row in range(size):
+        for col in range(1, size):
+            square = row * size + col
+            slots.append(("v", 1 << (row * fence_size + col), (col, row), square - 1, square))
+    return slots
+
+
+def build_slot_conflicts(slots):
+    """Precomputes which fence slots each fence slot rules out once it holds a fence
+    Parameters: Fence slot table from build_fence_slots
+    Returns: List holding, for each slot, a bitmask of slot indexes that can no longer take a fence
+    Note: Two fences conflict when they cover the same edge between two squares. Every fence here covers
+    a single edge, so each slot only conflicts with itself
+    """
+    # Groups the slots by the edge they cover, then gives each slot the mask of its group
+    edges = {}
+    for index, slot in enumerate(slots):
+        edges[slot[3], slot[4]] = edges.get((slot[3], slot[4]), 0) | 1 << index
+    return [edges[slot[3], slot[4]] for slot in slots]
+
+
+def build_square_slots(slots, size):
+    """Groups the fence slots by the squares they border
+    Parameters: Fence slot table from build_fence_slots, number of squares along one side of the board
+    Returns: List holding, for each square, the indexes of the slots on its sides
+    """
+    square_slots = [[] for square in range(size * size)]
+    for index, slot in enumerate(slots):
+        square_slots[slot[3]].append(index)
+        square_slots[slot[4]].append(index)
+    return square_slots
+
+
+def build_zobrist_keys(seed, players, squares, slots, fences):
+    """Generates the random 64-bit values XORed together to form a position key
+    Parameters: Random seed, number of players, squares on the board, fence slots, starting fences
+    Returns: Tuple of (pawn keys per player per square, key per fence slot,
+    side-to-move key per player, remaining-fence keys per player per fence count)
+    Note: A fixed seed keeps keys identical across processes, so they can be shared between workers
+    """
+    rng = random.Random(seed)
+    pawns = [[rng.getrandbits(64) for square in range(squares)] for player in range(players)]
+    fence_slots = [rng.getrandbits(64) for slot in range(slots)]
+    turns = [rng.getrandbits(64) for player in range(players)]
+    counts = [[rng.getrandbits(64) for count in range(fences + 1)] for player in range(players)]
+    return pawns, fence_slots, turns, counts
+
+
+def build_goal_tables(size, players):
+    """Works out where each player starts and which squares they have to reach
+    Parameters: The number of squares along one side of the board, number of players (2 or 4)
+    Returns: Tuple of (starting square per player, list of goal squares per player) in turn order
+    Note: Two players start in the middle of the top and bottom sides. Four players go round the
+    board clockwise from the top. Every player has to reach the side opposite their start
+    """
+    middle = size // 2
+    top = ((0, middle), [(size - 1) * size + col for col in range(size)])
+    right = ((middle, size - 1), [row * size for row in range(size)])
+    bottom = ((size - 1, middle), [col for col in range(size)])
+    left = ((middle, 0), [row * size + size - 1 for row in range(size)])
+    sides = (top, bottom) if players == 2 else (top, right, bottom, left)
+    return [row * size + col for (row, col), goals in sides], [goals for start, goals in sides]
+
+
+class BoardTables:
+    """Precomputed tables for one board size, player count and starting fence count
+    Built once per configuration by get_tables and shared by every game that uses it, so larger
+    boards get the same table-driven move generation as the standard one
+    """
+    __slots__ = ("size", "fence_size", "squares", "players", "fences", "up", "down", "left", "right",
+                 "neighbours", "jumps", "fence_slots", "slot_lookup", "slot_conflicts", "all_slots",
+                 "square_slots", "positions",
+                 "pawn_moves", "zobrist_pawns", "zobrist_fences", "zobrist_turns", "zobrist_counts",
+                 "starts", "goals", "goal_masks", "mask_bytes", "snapshot_format")
+
+    def __init__(self, size, players, fences):
+        """Initializes a BoardTables
+        Parameters: The number of squares along one side of the board, number of players,
+        fences each player starts with
+        Returns: None
+        """
+        self.size = size
+        self.fence_size = size + 1
+        self.squares = size * size
+        self.players = players
+        self.fences = fences
+        self.up, self.down, self.left, self.right = build_edge_tables(size)
+        self.neighbours = build_neighbour_table(size)
+        self.jumps = build_jump_table(self.neighbours)
+        self.fence_slots = build_fence_slots(size)
+        # Index into fence_slots for each (direction, (x, y)) fence placement
+        self.slot_lookup = {(slot[0], slot[2]): index for index, slot in enumerate(self.fence_slots)}
+        # Slots each slot rules out, and the mask of every slot for a board with no fences placed
+        self.slot_conflicts = build_slot_conflicts(self.fence_slots)
+        self.all_slots = (1 << len(self.fence_slots)) - 1
+        self.square_slots = build_square_slots(self.fence_slots, size)
+        # (row, col) position of every square, shared so moving a pawn doesn't build a new position
+        self.positions = [divmod(square, size) for square in range(self.squares)]
+        # Move codes: a pawn move is its target square, a fence is pawn_moves + its slot
+        self.pawn_moves = self.squares
+        self.zobrist_pawns, self.zobrist_fences, self.zobrist_turns, self.zobrist_counts = \
+            build_zobrist_keys(ZOBRIST_SEED, players, self.squares, len(self.fence_slots), fences)
+        self.starts, self.goals = build_goal_tables(size, players)
+        self.goal_masks = [sum(1 << square for square in goals) for goals in self.goals]
+        # Snapshot layout: pawn squares, both fence masks, fence counts, and the player to move in the
+        # low nibble of the last byte with the winner (0 if none) in the high nibble
+        self.mask_bytes = (self.fence_size * self.fence_size + 7) // 8
+        self.snapshot_format = struct.Struct("<%dB%ds%ds%dB" % (players, self.mask_bytes, self.mask_bytes,
+                                                              players + 1))
+
+
+# Tables built so far, keyed by (size, players, fences)
+TABLES = {}
+
+
+def get_tables(size=BOARD_SIZE, players=2, fences=None):
+    """Returns the precomputed tables of a configuration, building them the first time
+    Parameters: The number of squares along one side of the board, number of players (2 or 4),
+    fences each player starts with (STARTING_FENCES for two players, FOUR_PLAYER_FENCES for four)
+    Returns: BoardTables object
+    Raises: ValueError for a player count other than 2 or 4, or a board that doesn't fit the packed state
+    """
+    if players != 2 and players != 4:
+        raise ValueError("Quoridor is played by 2 or 4 players")
+    if size < MIN_BOARD_SIZE or size > MAX_BOARD_SIZE:
+        raise ValueError("Board size must be between " + str(MIN_BOARD_SIZE) + " and " + str(MAX_BOARD_SIZE))
+    if fences is None:
+        fences = STARTING_FENCES if players == 2 else FOUR_PLAYER_FENCES
+    tables = TABLES.get((size, players, fences))
+    if tables is None:
+        tables = BoardTables(size, players, fences)
+        TABLES[(size, players, fences)] = tables
+    return tables
+
+
+# Tables of the standard game, also exported under their own names for code that only plays it
+DEFAULT_TABLES = get_tables(BOARD_SIZE, 2, STARTING_FENCES)
+# Fence bits bordering each square of the standard board
+UP_FENCE, DOWN_FENCE, LEFT_FENCE, RIGHT_FENCE = \
+    DEFAULT_TABLES.up, DEFAULT_TABLES.down, DEFAULT_TABLES.left, DEFAULT_TABLES.right
+# Neighbour, jump and fence slot tables of the standard board
+NEIGHBOURS = DEFAULT_TABLES.neighbours
+JUMP_TABLE = DEFAULT_TABLES.jumps
+FENCE_SLOTS = DEFAULT_TABLES.fence_slots
+# Index into FENCE_SLOTS for each (direction, (x, y)) fence placement
+FENCE_SLOT_LOOKUP = DEFAULT_TABLES.slot_lookup
+# Bitmask of the slots each slot conflicts with
+SLOT_CONFLICTS = DEFAULT_TABLES.slot_conflicts
+# Indexes into FENCE_SLOTS of the fences on the sides of each square
+SQUARE_SLOTS = DEFAULT_TABLES.square_slots
+# (row, col) position of every square
+SQUARE_POSITIONS = DEFAULT_TABLES.positions
+# Move codes used by push/pop: a pawn move is its target square, a fence is PAWN_MOVES + its slot
+PAWN_MOVES = DEFAULT_TABLES.pawn_moves
+# Zobrist keys of the standard game
+ZOBRIST_PAWNS, ZOBRIST_FENCES, ZOBRIST_TURNS, ZOBRIST_COUNTS = \
+    DEFAULT_TABLES.zobrist_pawns, DEFAULT_TABLES.zobrist_fences, DEFAULT_TABLES.zobrist_turns, \
+    DEFAULT_TABLES.zobrist_counts
+# Bytes of one fence bitmask and of a snapshot of the standard game
+FENCE_MASK_BYTES = DEFAULT_TABLES.mask_bytes
+SNAPSHOT_FORMAT = DEFAULT_TABLES.snapshot_format
+SNAPSHOT_SIZE = SNAPSHOT_FORMAT.size
+
+
+def pawn_targets(open_edges, occupied, square, jumps=JUMP_TABLE):
+    """Generates the squares a pawn can move to from the jump table
+    Parameters: Open-edge table (DIRECTION_BITS per square), bitmask of squares holding a pawn,
+    square of the pawn to move, jump table of the board (the standard board's by default)
+    Returns: List of target squares (row * size + col)
+    """
+    squares = []
+    for direction in (UP, DOWN, LEFT, RIGHT):
+        if not open_edges[square] & DIRECTION_BITS[direction]:
+            continue
+        middle, landing, side_a, side_b = jumps[square][direction]
+        # Steps onto an empty neighbouring square
+        if not (occupied >> middle) & 1:
+            squares.append(middle)
+        # Jumps straight over a pawn that has no fence behind it
+        elif open_edges[middle] & DIRECTION_BITS[direction]:
+            if not (occupied >> landing) & 1:
+                squares.append(landing)
+        # Steps diagonally around a pawn that has a fence behind it. With more than two players a
+        # diagonal square can be reached around two different pawns, and is only listed once
+        else:
+            first, second = PERPENDICULAR[direction]
+            if open_edges[middle] & DIRECTION_BITS[first] and not (occupied >> side_a) & 1 \
+                    and side_a not in squares:
+                squares.append(side_a)
+            if open_edges[middle] & DIRECTION_BITS[second] and not (occupied >> side_b) & 1 \
+                    and side_b not in squares:
+                squares.append(side_b)
+    return squares
+
+
+class PathIndex:
+    """Keeps the distance from every square to one player's goal side
+    Distances ignore pawns, as only fences can cut a path. When an edge is fenced off, only the
+    squares whose every shortest path crossed that edge are recomputed
+    Needs the open-edge table owned by a QuoridorGame object
+    """
+    def __init__(self, open_edges, goals, neighbours=NEIGHBOURS):
+        """Initializes a PathIndex
+        Parameters: Open-edge table of the game, squares the player has to reach,
+        neighbour table of the board (the standard board's by default)
+        Returns: None
+        """
+        self._open = open_edges
+        self._goals = goals
+        self._neighbours = neighbours
+        self._distances = [UNREACHABLE] * len(neighbours)
+        self.rebuild()
+
+    def rebuild(self):
+        """Recomputes every distance with a breadth first search out from the goal side
+        Parameters: None
+        Returns: None
+        """
+        distances = self._distances
+        open_edges = self._open
+        neighbours = self._neighbours
+        for square in range(len(distances)):
+            distances[square] = UNREACHABLE
+        for square in self._goals:
+            distances[square] = 0
+        queue = list(self._goals)
+        for square in queue:
+            step = distances[square] + 1
+            for direction in (UP, DOWN, LEFT, RIGHT):
+                if open_edges[square] & DIRECTION_BITS[direction]:
+                    neighbour = neighbours[square][direction]
+                    if distances[neighbour] == UNREACHABLE:
+                        distances[neighbour] = step
+                        queue.append(neighbour)
+
+    def get_distance(self, square):
+        """Returns the number of steps from a square to the goal side
+        Parameters: The square (row * size + col)
+        Returns: The distance, or UNREACHABLE if fences cut the square off from the goal side
+        """
+        return self._distances[square]
+
+    def get_distances(self):
+        """Returns the distance field of every square
+        Parameters: None
+        Returns: List of distances indexed by square
+        Note: The list is owned by the index and must not be modified
+        """
+        return self._distances
+
+    def repair(self, square_a, square_b):
+        """Works out which distances change if the edge between two neighbouring squares is fenced
+        Parameters: The two squares on either side of the edge
+        Returns: Dict mapping each square whose distance changes to its new distance
+        Note: Nothing is modified, so this can test a fence before it is placed
+        """
+        distances = self._distances
+        open_edges = self._open
+        neighbours = self._neighbours
+        # Only an edge leading one step closer to the goal can lengthen a path
+        if distances[square_a] == distances[square_b]:
+            return {}
+        if distances[square_a] > distances[square_b]:
+            far, near = square_a, square_b
+        else:
+            far, near = square_b, square_a
+        if self.is_supported(far, (), far, near):
+            return {}
+        # Collects the squares left with no neighbour one step closer to the goal
+        orphans = {far}
+        queue = [far]
+        for square in queue:
+            for direction in (UP, DOWN, LEFT, RIGHT):
+                if not open_edges[square] & DIRECTION_BITS[direction]:
+                    continue
+                child = neighbours[square][direction]
+                if distances[child] == distances[square] + 1 and child not in orphans \
+                        and not self.is_supported(child, orphans, far, near):
+                    orphans.add(child)
+                    queue.append(child)
+        # Restarts each orphaned square from its best remaining neighbour outside the orphans
+        changes = {}
+        heap = []
+        for square in orphans:
+            best = UNREACHABLE
+            for direction in (UP, DOWN, LEFT, RIGHT):
+                if open_edges[square] & DIRECTION_BITS[direction]:
+                    neighbour = neighbours[square][direction]
+                    if neighbour not in orphans and not (square == far and neighbour == near):
+                        best = min(best, distances[neighbour] + 1)
+            changes[square] = best
+            if best < UNREACHABLE:
+                heapq.heappush(heap, (best, square))
+        # Spreads the new distances through the orphans, nearest first
+        while heap:
+            distance, square = heapq.heappop(heap)
+            if distance > changes[square]:
+                continue
+            for direction in (UP, DOWN, LEFT, RIGHT):
+                if open_edges[square] & DIRECTION_BITS[direction]:
+                    neighbour = neighbours[square][direction]
+                    if neighbour in orphans and distance + 1 < changes[neighbour]:
+                        changes[neighbour] = distance + 1
+                        heapq.heappush(heap, (distance + 1, neighbour))
+        return changes
+
+    def is_supported(self, square, orphans, far, near):
+        """Checks whether a square still has a neighbour one step closer to the goal
+        Parameters: The square, squares already known to lose their distance, and the far and
+        near squares of the edge being fenced
+        Returns: True if a shortest path from the square survives / False if it does not
+        """
+        distances = self._distances
+        open_edges = self._open
+        neighbours = self._neighbours
+        target = distances[square] - 1
+        for direction in (UP, DOWN, LEFT, RIGHT):
+            if open_edges[square] & DIRECTION_BITS[direction]:
+                neighbour = neighbours[square][direction]
+                if distances[neighbour] == target and neighbour not in orphans \
+                        and not (square == far and neighbour == near):
+                    return True
+        return False
+
+    def shortest_path(self, square):
+        """Follows the distance field from a square down to the goal side
+        Parameters: The starting square
+        Returns: List of squares on one shortest path, starting square first and goal square last
+        Note: Empty if the square has no path to the goal side
+        """
+        distances = self._distances
+        open_edges = self._open
+        neighbours = self._neighbours
+        if distances[square] == UNREACHABLE:
+            return []
+        path = [square]
+        while distances[square] > 0:
+            for direction in (UP, DOWN, LEFT, RIGHT):
+                if open_edges[square] & DIRECTION_BITS[direction]:
+                    neighbour = neighbours[square][direction]
+                    if distances[neighbour] == distances[square] - 1:
+                        square = neighbour
+                        break
+            path.append(square)
+        return path
+
+    def apply(self, changes):
+        """Stores the distances worked out by repair once the fence has been placed
+        Parameters: Dict of changed distances returned by repair
+        Returns: None
+        """
+        distances = self._distances
+        for square, distance in changes.items():
+            distances[square] = distance
+
+
 class QuoridorGame:
     """Contains functions for setting up and playing a game of Quoridor
     Includes functions for pawn movement, fence placement, turn handling, and game completion
-    Needs to communicate with player objects and pawn objects for both players/pawns
+    Needs to communicate with player objects and pawn objects for every player/pawn
+    Note: The board is stored as integer bitboards rather than nested lists. Horizontal and vertical
+    fences each live in their own bitmask, and the pawn squares are packed into a single integer.
+    Board size, player count and fence count are set per game, with the tables for each configuration
+    built once by get_tables
     """
-    def __init__(self):
+    __slots__ = ("_tables", "_occupied", "_pawns", "_h_fences", "_v_fences", "_open", "_paths", "_players",
+                 "_current_player", "_game_won", "_winner", "_key", "_quiet", "_last_error", "_moves",
+                 "_frames", "_depth", "_distance_cache", "_available")
+
+    def __init__(self, quiet=False, size=BOARD_SIZE, players=2, fences=None):
         """Initializes a QuoridorGame
-        Parameters: None
+        Parameters: Whether to keep the game from printing anything (False by default), number of squares
+        along one side of the board, number of players (2 or 4), fences each player starts with
+        (STARTING_FENCES for two players and FOUR_PLAYER_FENCES for four by default)
         Returns: None
         """
-        # Creates a 9x9 matrix of all 0's for pawn management
-        self._board = [[0 for j in range(9)] for i in range(9)]
-        # Creates a 10x10 matrix of all 0's for fence management
-        self._fence_board = [[0 for j in range(10)] for i in range(10)]
+        tables = get_tables(size, players, fences)
+        # Neighbour, jump, fence slot, goal and key tables of the board, shared between games
+        self._tables = tables
+        # Bitmask of squares holding a pawn, one bit per square (row * size + col)
+        self._occupied = 0
+        # Square of every pawn, packed PAWN_BITS per player in turn order
+        self._pawns = 0
+        # Bitmasks of horizontal and vertical fences, one bit per cell (row * fence_size + col)
+        self._h_fences = 0
+        self._v_fences = 0
         self.generate_edges()
+        # Bitmask of the fence slots that can still take a fence, one bit per slot index
+        self._available = tables.all_slots
+        # Directions a pawn can leave each square in without crossing a fence, as DIRECTION_BITS
+        self._open = [self.open_directions(square) for square in range(tables.squares)]
+        # Distances from every square to each player's goal side, repaired as fences are placed
+        self._paths = tuple(PathIndex(self._open, goals, tables.neighbours) for goals in tables.goals)
+        # Configures the Player objects, in turn order
+        self._players = tuple(Player(Pawn(tables.positions[square]), "P" + str(index + 1), tables.fences)
+                              for index, square in enumerate(tables.starts))
         # Places the pawns to their starting positions
-        self._board[0][4] = "P1"
-        self._board[8][4] = "P2"
-        self._pawn1 = Pawn((0, 4))
-        self._pawn2 = Pawn((8, 4))
-        # Configures the Player objects
-        self._player1 = Player(self._pawn1, "P1")
-        self._player2 = Player(self._pawn2, "P2")
+        for index, square in enumerate(tables.starts):
+            self._occupied |= 1 << square
+            self._pawns |= square << (index * PAWN_BITS)
         # Initializes variables for handling current player and game winner
-        self._current_player = self._player1
+        self._current_player = self._players[0]
         self._game_won = False
         self._winner = None
+        # Zobrist key of the position, kept up to date as pawns, fences and turns change
+        self._key = self.compute_key()
+        # Silences every message, and the reason the last rejected move was rejected
+        self._quiet = quiet
+        self._last_error = MoveError.OK
+        # Move codes of every move played so far, in order
+        self._moves = []
+        # Undo frames for push/pop, reused between calls, and how many are currently in use
+        self._frames = []
+        self._depth = 0
+        # Optional cache of the distance fields of fence layouts, see set_distance_cache
+        self._distance_cache = None
 
     def generate_edges(self):
         """Adds fences to the edges of the board
@@ -32,149 +564,225 @@ class QuoridorGame:
         Returns: None
         Note: Part of the initialization of a QuoridorGame
         """
-        for entry in range(0, 9):
-            self._fence_board[0][entry] = "h"
-        for entry in range(0, 9):
-            self._fence_board[entry][0] = "v"
-        for entry in range(0, 9):
-            self._fence_board[9][entry] = "h"
-        for entry in range(0, 9):
-            self._fence_board[entry][9] = "v"
-        self._fence_board[0][0] = "vh"
-        self._fence_board[9][9] = "vh"
+        size = self._tables.size
+        fence_size = self._tables.fence_size
+        for entry in range(0, size):
+            self._h_fences |= 1 << entry
+            self._v_fences |= 1 << (entry * fence_size)
+            self._h_fences |= 1 << (size * fence_size + entry)
+            self._v_fences |= 1 << (entry * fence_size + size)
+        # Marks the outer corner cell as holding both fence directions
+        corner = 1 << (size * fence_size + size)
+        self._h_fences |= corner
+        self._v_fences |= corner
+
+    def open_directions(self, square):
+        """Determines which directions a pawn can leave a square in without crossing a fence
+        Parameters: The square (row * size + col)
+        Returns: Combination of DIRECTION_BITS for every unfenced side of the square
+        Note: Used to build self._open, which is then kept up to date by close_edge
+        """
+        tables = self._tables
+        open_bits = ALL_DIRECTIONS
+        if self._h_fences & tables.up[square]:
+            open_bits &= ~DIRECTION_BITS[UP]
+        if self._h_fences & tables.down[square]:
+            open_bits &= ~DIRECTION_BITS[DOWN]
+        if self._v_fences & tables.left[square]:
+            open_bits &= ~DIRECTION_BITS[LEFT]
+        if self._v_fences & tables.right[square]:
+            open_bits &= ~DIRECTION_BITS[RIGHT]
+        return open_bits
+
+    def close_edge(self, direction, row, col):
+        """Updates the open-edge table for a newly placed fence
+        Parameters: Fence direction ("h" or "v"), row and column of the fence cell
+        Returns: None
+        Note: Only the two squares on either side of the fence are touched
+        """
+        size = self._tables.size
+        square = row * size + col
+        if direction == "h":
+            # A horizontal fence sits above (row, col) and below (row - 1, col)
+            self._open[square] &= ~DIRECTION_BITS[UP]
+            self._open[square - size] &= ~DIRECTION_BITS[DOWN]
+        else:
+            # A vertical fence sits left of (row, col) and right of (row, col - 1)
+            self._open[square] &= ~DIRECTION_BITS[LEFT]
+            self._open[square - 1] &= ~DIRECTION_BITS[RIGHT]
 
     def lookup_player(self, player_number):
         """Takes a player number and returns the object associated with that player
-        Parameters: The integer number representing a player (1 or 2)
+        Parameters: The integer number representing a player (1 up to the number of players)
         Returns: The player object associated with that number
+        Note: Any number past the first that isn't a player's goes to the last player
         """
-        if player_number == 1:
-            return self._player1
+        if 1 <= player_number <= len(self._players):
+            return self._players[player_number - 1]
         else:
-            return self._player2
+            return self._players[-1]
 
-    def check_jump(self, pos, current_pos):
+    def get_pawn_square(self, index):
+        """Reads the square of a pawn from the packed pawn state
+        Parameters: Index of the player in turn order (counting from 0)
+        Returns: The square of that player's pawn (row * size + col)
+        """
+        return (self._pawns >> (index * PAWN_BITS)) & PAWN_MASK
+
+    def set_pawn_square(self, index, square):
+        """Moves a pawn to a new square on the bitboards
+        Parameters: Index of the player in turn order (counting from 0), target square (row * size + col)
+        Returns: None
+        Note: Updates self._occupied, self._pawns, the position key and the position stored on the Pawn object
+        """
+        tables = self._tables
+        shift = index * PAWN_BITS
+        old_square = (self._pawns >> shift) & PAWN_MASK
+        self._occupied = (self._occupied & ~(1 << old_square)) | (1 << square)
+        self._pawns = (self._pawns & ~(PAWN_MASK << shift)) | (square << shift)
+        self._key ^= tables.zobrist_pawns[index][old_square] ^ tables.zobrist_pawns[index][square]
+        self._players[index].get_pawn().set_pos(tables.positions[square])
+
+    def pawn_at(self, row, col):
+        """Checks whether a square holds a pawn
+        Parameters: Row and column of the square
+        Returns: True if a pawn occupies the square / False if it is empty or off the board
+        """
+        size = self._tables.size
+        if row < 0 or row >= size or col < 0 or col >= size:
+            return False
+        return (self._occupied >> (row * size + col)) & 1 == 1
+
+    def jump_error(self, pos, current_pos):
         """Checks if a pawn jump is a valid move
         Parameters: Target position, current position
-        Returns: True if the jump is valid / False if the jump is blocked
+        Returns: MoveError.OK if the jump is valid / the reason the jump is invalid
         """
+        tables = self._tables
+        size = tables.size
+        row, col = current_pos
+        square = row * size + col
         # Handles a jump upwards
-        if current_pos[0] - pos[0] == 2 and self._board[current_pos[0]-1][current_pos[1]] != 0:
+        if row - pos[0] == 2 and self.pawn_at(row - 1, col):
             # Ensures a fence won't obstruct the jump
-            if self._fence_board[current_pos[0]-1][current_pos[1]] == "h" or\
-                    self._fence_board[current_pos[0]-1][current_pos[1]] == "vh":
-                print("Jump blocked by fence!")
-                return False
+            if self._h_fences & tables.up[square - size]:
+                return MoveError.JUMP_BLOCKED
             else:
-                return True
+                return MoveError.OK
         # Handles a jump downwards
-        if current_pos[0] - pos[0] == -2 and self._board[current_pos[0]+1][current_pos[1]] != 0:
+        if row - pos[0] == -2 and self.pawn_at(row + 1, col):
             # Ensures a fence won't obstruct the jump
-            if self._fence_board[current_pos[0]+2][current_pos[1]] == "h" or\
-                    self._fence_board[current_pos[0]+2][current_pos[1]] == "vh":
-                print("Jump blocked by fence!")
-                return False
+            if self._h_fences & tables.down[square + size]:
+                return MoveError.JUMP_BLOCKED
             else:
-                return True
+                return MoveError.OK
         # Handles a jump to the left
-        if current_pos[1] - pos[1] == 2 and self._board[current_pos[0]][current_pos[1]-1] != 0:
+        if col - pos[1] == 2 and self.pawn_at(row, col - 1):
             # Ensures a fence won't obstruct the jump
-            if self._fence_board[current_pos[0]][current_pos[1]-1] == "v" or\
-                    self._fence_board[pos[0]][pos[1]-1] == "vh":
-                print("Jump blocked by fence!")
-                return False
+            if self._v_fences & tables.left[square - 1]:
+                return MoveError.JUMP_BLOCKED
             else:
-                return True
+                return MoveError.OK
         # Handles a jump to the right
-        if current_pos[1] - pos[1] == -2 and self._board[current_pos[0]][current_pos[1]+1] != 0:
+        if col - pos[1] == -2 and self.pawn_at(row, col + 1):
             # Ensures a fence won't obstruct the jump
-            if self._fence_board[current_pos[0]][current_pos[1]+2] == "v" or\
-                    self._fence_board[current_pos[0]][current_pos[1]+2] == "vh":
-                print("Jump blocked by fence!")
-                return False
+            if self._v_fences & tables.right[square + 1]:
+                return MoveError.JUMP_BLOCKED
             else:
-                return True
-        # If none of the above is true, the move is 2 spaces, but invalid. Returns False
-        print("Invalid number of spaces!")
-        return False
+                return MoveError.OK
+        # If none of the above is true, the move is 2 spaces, but invalid
+        return MoveError.INVALID_DISTANCE
+
+    def check_jump(self, pos, current_pos):
+        """Checks if a pawn jump is a valid move
+        Parameters: Target position, current position
+        Returns: True if the jump is valid / False if the jump is blocked
+        Note: Reports why the jump is blocked unless the game is quiet
+        """
+        return self.report(self.jump_error(pos, current_pos))
 
     def check_diag(self, current_pos, dir):
         """If a player attempts a diagonal move, checks if that move is valid per the rules
         Parameters: current position, movement direction
         Returns: False if the move is invalid / True if the move is valid
         """
+        tables = self._tables
+        size = tables.size
+        row, col = current_pos
+        square = row * size + col
         # Checks moves upwards
         if dir == "nw" or dir == "ne":
-            # Checks for opponent pawn
-            if self._board[current_pos[0]-1][current_pos[1]] != 0:
-                # Ensures the opponent pawn has a fence behind it
-                if self._fence_board[current_pos[0]-1][current_pos[1]] == "h" \
-                        or self._fence_board[current_pos[0]-1][current_pos[1]] == "vh":
+            # Checks for an opponent pawn that isn't fenced off from the player
+            if self.pawn_at(row - 1, col) and not self._h_fences & tables.up[square]:
+                # Ensures the opponent pawn has a fence behind it and none on the side stepped to
+                side = tables.left if dir == "nw" else tables.right
+                if self._h_fences & tables.up[square - size] and not self._v_fences & side[square - size]:
                     return True
         # Checks moves to the right
         if dir == "ne" or dir == "se":
-            # Checks for opponent pawn
-            if self._board[current_pos[0]][current_pos[1]+1] != 0:
-                # Ensures the opponent pawn has a fence behind it
-                if self._fence_board[current_pos[0]][current_pos[1]+2] == "v" \
-                        or self._fence_board[current_pos[0]][current_pos[1]+2] == "vh":
+            # Checks for an opponent pawn that isn't fenced off from the player
+            if self.pawn_at(row, col + 1) and not self._v_fences & tables.right[square]:
+                # Ensures the opponent pawn has a fence behind it and none on the side stepped to
+                side = tables.up if dir == "ne" else tables.down
+                if self._v_fences & tables.right[square + 1] and not self._h_fences & side[square + 1]:
                     return True
         # Checks moves downwards
         if dir == "sw" or dir == "se":
-            # Checks for opponent pawn
-            if self._board[current_pos[0]+1][current_pos[1]] != 0:
-                # Ensures the opponent pawn has a fence behind it
-                if self._fence_board[current_pos[0]+2][current_pos[1]] == "h" \
-                        or self._fence_board[current_pos[0]+2][current_pos[1]] == "vh":
+            # Checks for an opponent pawn that isn't fenced off from the player
+            if self.pawn_at(row + 1, col) and not self._h_fences & tables.down[square]:
+                # Ensures the opponent pawn has a fence behind it and none on the side stepped to
+                side = tables.left if dir == "sw" else tables.right
+                if self._h_fences & tables.down[square + size] and not self._v_fences & side[square + size]:
                     return True
         # Checks moves to the left
         if dir == "nw" or dir == "sw":
-            # Checks for opponent pawn
-            if self._board[current_pos[0]][current_pos[1]-1] != 0:
-                # Ensures the opponent pawn has a fence behind it
-                if self._fence_board[current_pos[0]][current_pos[1]-1] == "v" \
-                        or self._fence_board[current_pos[0]][current_pos[1]-1] == "vh":
+            # Checks for an opponent pawn that isn't fenced off from the player
+            if self.pawn_at(row, col - 1) and not self._v_fences & tables.left[square]:
+                # Ensures the opponent pawn has a fence behind it and none on the side stepped to
+                side = tables.up if dir == "nw" else tables.down
+                if self._v_fences & tables.left[square - 1] and not self._h_fences & side[square - 1]:
                     return True
         return False
 
-    def validate_movement(self, pos, current_pos):
+    def movement_error(self, pos, current_pos):
         """Ensures the player movement is valid
         Parameters: Pawn target position and current position
-        Returns: True if move is valid / False if move is invalid
+        Returns: MoveError.OK if move is valid / the reason the move is invalid
         """
+        size = self._tables.size
         dir = self.determine_dir(pos, current_pos)
         # Handles attempts to move outside the board
-        if pos[0] > 8 or pos[0] < 0 or pos[1] > 8 or pos[1] < 0:
-            print("Move blocked by a fence!")
-            return False
+        if pos[0] > size - 1 or pos[0] < 0 or pos[1] > size - 1 or pos[1] < 0:
+            return MoveError.OUT_OF_BOUNDS
         # Handles pawn overlap
-        if self._board[pos[0]][pos[1]] != 0:
-            print("Move blocked by a pawn!")
-            return False
+        if self.pawn_at(pos[0], pos[1]):
+            return MoveError.OVERLAP
         # Handles player trying to move diagonally
         if current_pos[0] - pos[0] != 0 and current_pos[1] - pos[1] != 0:
             # Checks to see if it is a valid diagonal move
             if self.check_diag(current_pos, dir):
                 # Shortcuts the check on number of spaces since that is already checked
-                return True
+                return MoveError.OK
             else:
-                print("Can't move diagonally!")
-                return False
+                return MoveError.INVALID_DIAGONAL
         # Handles player attempting to move an invalid number of spaces
         if (current_pos[0] - pos[0] == 2 or current_pos[0] - pos[0] == -2
                 or current_pos[1] - pos[1] == 2 or current_pos[1] - pos[1] == -2):
             # If the player tries to move 2 spaces, check if it is a pawn jump
-            if self.check_jump(pos, current_pos):
-                return True
-            else:
-                return False
+            return self.jump_error(pos, current_pos)
         if current_pos[0] - pos[0] > 1 or current_pos[0] - pos[0] < -1:
-            print("Invalid number of spaces!")
-            return False
+            return MoveError.INVALID_DISTANCE
         if current_pos[1] - pos[1] > 1 or current_pos[1] - pos[1] < -1:
-            print("Invalid number of spaces!")
-            return False
-        return True
+            return MoveError.INVALID_DISTANCE
+        return MoveError.OK
+
+    def validate_movement(self, pos, current_pos):
+        """Ensures the player movement is valid
+        Parameters: Pawn target position and current position
+        Returns: True if move is valid / False if move is invalid
+        Note: Reports why the move is invalid unless the game is quiet
+        """
+        return self.report(self.movement_error(pos, current_pos))
 
     def determine_dir(self, pos, current_pos):
         """Determines the direction the player is attempting to move
@@ -207,210 +815,762 @@ class QuoridorGame:
             dir = "down"
             return dir
 
-    def collision_check(self, pos, current_pos):
+    def collision_error(self, pos, current_pos):
         """Checks for collision with fences
         Parameters: Pawn target position and current position
-        Returns: True if the move is valid / False if the move in invalid
+        Returns: MoveError.OK if the move is valid / MoveError.FENCE_BLOCKED if a fence is in the way
         """
+        tables = self._tables
+        size = tables.size
         # Determines the direction the player is attempting to move
         dir = self.determine_dir(pos, current_pos)
+        row, col = current_pos
+        square = row * size + col
         # Handles fences when moving left
-        if dir == "left" and \
-                (self._fence_board[current_pos[0]][current_pos[1]] == "v"
-                 or self._fence_board[current_pos[0]][current_pos[1]] == "vh"):
-            print("Move blocked by fence!")
-            return False
+        if dir == "left" and self._v_fences & tables.left[square]:
+            return MoveError.FENCE_BLOCKED
         # Handles fences when moving right
-        if dir == "right" and \
-                (self._fence_board[current_pos[0]][current_pos[1]+1] == "v"
-                 or self._fence_board[current_pos[0]][current_pos[1]+1] == "vh"):
-            print("Move blocked by fence!")
-            return False
+        if dir == "right" and self._v_fences & tables.right[square]:
+            return MoveError.FENCE_BLOCKED
         # Handles fences when moving up
-        if dir == "up" and \
-                (self._fence_board[current_pos[0]][current_pos[1]] == "h"
-                 or self._fence_board[current_pos[0]][current_pos[1]] == "vh"):
-            print("Move blocked by fence!")
-            return False
+        if dir == "up" and self._h_fences & tables.up[square]:
+            return MoveError.FENCE_BLOCKED
         # Handles fences when moving down
-        if dir == "down" \
-                and (self._fence_board[current_pos[0]+1][current_pos[1]] == "h"
-                     or self._fence_board[current_pos[0]+1][current_pos[1]] == "vh"):
-            print("Move blocked by fence!")
-            return False
+        if dir == "down" and self._h_fences & tables.down[square]:
+            return MoveError.FENCE_BLOCKED
+        # Handles diagonal movement, which steps around a pawn above/below or beside the player. Every
+        # pawn it could step around gets a route, and the move is blocked only if fences block every route
+        routes = []
         # Handles NW movement when the opposing pawn is above
-        if dir == "nw" and self._board[current_pos[0]-1][current_pos[1]] != 0 \
-                and (self._fence_board[current_pos[0]-1][current_pos[1]] == "v"
-                     or self._fence_board[current_pos[0]-1][current_pos[1]] == "vh"):
-            print("Move blocked by fence!")
-            return False
+        if dir == "nw" and self.pawn_at(row - 1, col):
+            routes.append(self._v_fences & tables.left[square - size])
         # Handles NW movement when the opposing pawn is to the left
-        if dir == "nw" and self._board[current_pos[0]][current_pos[1]-1] != 0 \
-                and (self._fence_board[current_pos[0]][current_pos[1]-1] == "h"
-                     or self._fence_board[current_pos[0]][current_pos[1]-1] == "vh"):
-            print("Move blocked by fence!")
-            return False
+        if dir == "nw" and self.pawn_at(row, col - 1):
+            routes.append(self._h_fences & tables.up[square - 1])
         # Handles NE movement when the opposing pawn is above
-        if dir == "ne" and self._board[current_pos[0]-1][current_pos[1]] != 0 \
-                and (self._fence_board[current_pos[0]-1][current_pos[1]+1] == "v"
-                     or self._fence_board[current_pos[0]-1][current_pos[1]+1] == "vh"):
-            print("Move blocked by fence!")
-            return False
+        if dir == "ne" and self.pawn_at(row - 1, col):
+            routes.append(self._v_fences & tables.right[square - size])
         # Handles NE movement when the opposing pawn is to the right
-        if dir == "ne" and self._board[current_pos[0]][current_pos[1]+1] != 0 \
-                and (self._fence_board[current_pos[0]][current_pos[1]+1] == "h"
-                     or self._fence_board[current_pos[0]][current_pos[1]+1] == "vh"):
-            print("Move blocked by fence!")
-            return False
+        if dir == "ne" and self.pawn_at(row, col + 1):
+            routes.append(self._h_fences & tables.up[square + 1])
         # Handles SE movement when the opposing pawn is to the below
-        if dir == "se" and self._board[current_pos[0]+1][current_pos[1]] != 0 \
-                and (self._fence_board[current_pos[0]+1][current_pos[1]+1] == "v"
-                     or self._fence_board[current_pos[0]+1][current_pos[1]+1] == "vh"):
-            print("Move blocked by fence!")
-            return False
+        if dir == "se" and self.pawn_at(row + 1, col):
+            routes.append(self._v_fences & tables.right[square + size])
         # Handles SE movement when the opposing pawn is to the right
-        if dir == "se" and self._board[current_pos[0]][current_pos[1]+1] != 0 \
-                and (self._fence_board[current_pos[0]+1][current_pos[1]+1] == "h"
-                     or self._fence_board[current_pos[0]+1][current_pos[1]+1] == "vh"):
-            print("Move blocked by fence!")
-            return False
+        if dir == "se" and self.pawn_at(row, col + 1):
+            routes.append(self._h_fences & tables.down[square + 1])
         # Handles SW movement when the opposing pawn is below
-        if dir == "sw" and self._board[current_pos[0]+1][current_pos[1]] != 0 \
-                and (self._fence_board[current_pos[0]+1][current_pos[1]] == "v"
-                     or self._fence_board[current_pos[0]+1][current_pos[1]] == "vh"):
-            print("Move blocked by fence!")
-            return False
+        if dir == "sw" and self.pawn_at(row + 1, col):
+            routes.append(self._v_fences & tables.left[square + size])
         # Handles SW movement when the opposing pawn is to the left
-        if dir == "sw" and self._board[current_pos[0]][current_pos[1]-1] != 0 \
-                and (self._fence_board[current_pos[0]+1][current_pos[1]-1] == "h"
-                     or self._fence_board[current_pos[0]+1][current_pos[1]-1] == "vh"):
-            print("Move blocked by fence!")
-            return False
-        return True
+        if dir == "sw" and self.pawn_at(row, col - 1):
+            routes.append(self._h_fences & tables.down[square - 1])
+        if routes and all(routes):
+            return MoveError.FENCE_BLOCKED
+        return MoveError.OK
 
-    def validate_turn(self, player):
+    def collision_check(self, pos, current_pos):
+        """Checks for collision with fences
+        Parameters: Pawn target position and current position
+        Returns: True if the move is valid / False if the move in invalid
+        Note: Reports the collision unless the game is quiet
+        """
+        return self.report(self.collision_error(pos, current_pos))
+
+    def turn_error(self, player):
         """Ensures that the correct player is making their move
         Parameters: Player object of the player attempting to make a move
-        Returns: True if the correct player is playing / False if the player is playing out of turn
+        Returns: MoveError.OK if the correct player is playing / MoveError.NOT_YOUR_TURN if they are not
         """
         if self._current_player != player:
-            print("It's not your turn! It's " + str(self._current_player.get_name()) + "'s turn!")
-            return False
+            return MoveError.NOT_YOUR_TURN
         else:
+            return MoveError.OK
+
+    def validate_turn(self, player):
+        """Ensures that the correct player is making their move
+        Parameters: Player object of the player attempting to make a move
+        Returns: True if the correct player is playing / False if the player is playing out of turn
+        Note: Reports whose turn it is unless the game is quiet
+        """
+        return self.report(self.turn_error(player))
+
+    def report(self, error):
+        """Reports the result of a rule check
+        Parameters: MoveError code
+        Returns: True if the code is MoveError.OK / False for any other code
+        Note: Prints the message for the code unless the game is quiet
+        """
+        if error == MoveError.OK:
             return True
+        self._last_error = error
+        if not self._quiet:
+            print(self.describe_error(error))
+        return False
+
+    def set_quiet(self, quiet):
+        """Turns printing of messages off or on
+        Parameters: True to keep the game from printing / False to print messages
+        Returns: None
+        """
+        self._quiet = quiet
+
+    def get_last_error(self):
+        """Returns why the last rejected move was rejected
+        Parameters: None
+        Returns: MoveError code, MoveError.OK if no move has been rejected yet
+        """
+        return self._last_error
+
+    def describe_error(self, error):
+        """Builds the human-readable message for a rule check result
+        Parameters: MoveError code
+        Returns: The message shown to players for that code
+        """
+        return ERROR_MESSAGES[error].format(player=self._current_player.get_name())
+
+    def announce(self, message):
+        """Prints a message about the game unless the game is quiet
+        Parameters: The message
+        Returns: None
+        """
+        if not self._quiet:
+            print(message)
 
     def make_move(self, player):
         """Changes the active player after a move is successfully played
         Parameters: Player object of the player making a move
         Returns: None
-        Note: Changes self._current_player to the other player
+        Note: Changes self._current_player to the next player in turn order
         """
-        if player == self._player1:
-            self._current_player = self._player2
-        else:
-            self._current_player = self._player1
+        turns = self._tables.zobrist_turns
+        index = self._players.index(player)
+        following = (index + 1) % len(self._players)
+        self._current_player = self._players[following]
+        self._key ^= turns[index] ^ turns[following]
 
     def check_win(self, player, pos):
         """Checks if a player has won the game
         Parameters: Player object, and current position of a pawn
         Returns: None
-        Note: Sets self.game_won to true if a pawn reaches the opposite back rank
+        Note: Sets self.game_won to true if a pawn reaches the side opposite its start
         """
-        if player == self._player1:
-            if pos[0] == 8:
-                self._game_won = True
-                print("Player One Wins!")
-                self._winner = self._player1
-        else:
-            if pos[0] == 0:
-                self._game_won = True
-                print("Player Two Wins!")
-                self._winner = self._player1
+        index = self._players.index(player)
+        if (self._tables.goal_masks[index] >> (pos[0] * self._tables.size + pos[1])) & 1:
+            self._game_won = True
+            self.announce("Player " + PLAYER_WORDS[index] + " Wins!")
+            self._winner = player
+
+    def pawn_move_error(self, player, pos):
+        """Runs every rule check on a pawn move without printing or changing anything
+        Parameters: Player object, target position in (row, col) notation
+        Returns: MoveError.OK if the move is valid / the reason it is invalid
+        """
+        # Ensures the game hasn't been won
+        if self._game_won:
+            return MoveError.GAME_OVER
+        # Ensures it is the proper turn
+        error = self.turn_error(player)
+        if error:
+            return error
+        current_pos = player.get_pawn().get_pos()
+        # Ensure that no collisions occur with fences
+        error = self.collision_error(pos, current_pos)
+        if error:
+            return error
+        # Ensures the move is valid
+        return self.movement_error(pos, current_pos)
+
+    def validate_pawn_move(self, player_num, raw_pos):
+        """Checks whether move_pawn would accept a move, without printing or changing anything
+        Parameters: Integer associated with a player, position entered by the user
+        Returns: MoveError.OK if the move is valid / the reason it is invalid
+        """
+        return self.pawn_move_error(self.lookup_player(player_num), (raw_pos[1], raw_pos[0]))
 
     def move_pawn(self, player_num, raw_pos):
         """Functions for moving a pawn within the parameters laid out in the game rules
         Parameters: Integer associated with a player, position entered by the user
         Returns: False if the move is invalid / True if the move is valid
-        Note: If a move is valid, updates the pawn position on self._board
+        Note: If a move is valid, updates the pawn position on the bitboards. If it is invalid, the reason
+        is kept for get_last_error and printed unless the game is quiet
         """
+        size = self._tables.size
         # Converts (n, m) notation to (m, n) notation
         pos = [[], []]
         pos[0] = raw_pos[1]
         pos[1] = raw_pos[0]
         # converts a player number to a player object
         player = self.lookup_player(player_num)
-        # Gets the players pawn, and the pawn position
-        pawn = player.get_pawn()
-        current_pos = pawn.get_pos()
-        # Ensures the game hasn't been won
-        if self._game_won:
-            print("The game is over!")
-            return False
-        # Ensures it is the proper turn
-        if not self.validate_turn(player):
-            return False
-        # Ensure that no collisions occur with fences
-        if not self.collision_check(pos, current_pos):
-            return False
-        # Ensures the move is valid
-        if not self.validate_movement(pos, current_pos):
+        if not self.report(self.pawn_move_error(player, pos)):
             return False
         # If the move is valid and no fences block the movement, move the pawn
-        self._board[current_pos[0]][current_pos[1]] = 0
-        self._board[pos[0]][pos[1]] = player.get_name()
-        pawn.set_pos(pos)
+        self.set_pawn_square(self._players.index(player), pos[0] * size + pos[1])
         self.check_win(player, pos)
+        self._moves.append(pos[0] * size + pos[1])
         self.make_move(player)
         return True
 
+    def fence_error(self, player, direction, pos):
+        """Runs every rule check on a fence placement without printing or changing anything
+        Parameters: Player object, fence direction, fence position in (row, col) notation
+        Returns: Tuple of (MoveError code, index into the fence slot table, distance changes from
+        fence_path_changes), where the slot and changes are None unless the code is MoveError.OK
+        """
+        tables = self._tables
+        size = tables.size
+        # Ensures the game has not been won
+        if self._game_won:
+            return MoveError.GAME_OVER, None, None
+        # Ensures it is the proper turn
+        error = self.turn_error(player)
+        if error:
+            return error, None, None
+        # Ensures that the player has fences to place
+        if player.get_fences() < 1:
+            return MoveError.NO_FENCES, None, None
+        # Ensures that the fence is either horizontal or vertical
+        if direction != "h" and direction != "v":
+            return MoveError.INVALID_DIRECTION, None, None
+        # Ensures that the fence can't be placed outside the game board
+        if direction == "h" and (pos[0] < 1 or pos[0] > size - 1 or pos[1] < 0 or pos[1] > size - 1):
+            return MoveError.FENCE_OUT_OF_BOUNDS, None, None
+        if direction == "v" and (pos[0] < 0 or pos[0] > size - 1 or pos[1] < 1 or pos[1] > size - 1):
+            return MoveError.FENCE_OUT_OF_BOUNDS, None, None
+        # Ensures that no fence already placed conflicts with this one
+        slot = tables.slot_lookup[(direction, (pos[1], pos[0]))]
+        if not (self._available >> slot) & 1:
+            return MoveError.FENCE_OVERLAP, None, None
+        # Ensures that the fence leaves every pawn a path to its goal row
+        changes = self.fence_path_changes(tables.fence_slots[slot][3], tables.fence_slots[slot][4])
+        if changes is None:
+            return MoveError.PATH_BLOCKED, None, None
+        return MoveError.OK, slot, changes
+
+    def validate_fence(self, player_num, direction, raw_pos):
+        """Checks whether place_fence would accept a fence, without printing or changing anything
+        Parameters: Integer associated with a player, fence direction, fence position entered by the user
+        Returns: MoveError.OK if the placement is valid / the reason it is invalid
+        """
+        return self.fence_error(self.lookup_player(player_num), direction, (raw_pos[1], raw_pos[0]))[0]
+
     def place_fence(self, player_num, direction, raw_pos):
         """Handles placing of fences
         Parameters: Integer associated with a player, fence direction, fence position entered by the user
         Returns: True if the fence placement is valid / False if it is invalid
-        Note: If a placement is valid, the fence is placed on self._fence_board
+        Note: If a placement is valid, the fence is added to the matching fence bitmask. If it is invalid,
+        the reason is kept for get_last_error and printed unless the game is quiet
         """
+        tables = self._tables
         # Converts (n, m) notation to (m, n) notation
         pos = [[], []]
         pos[0] = raw_pos[1]
         pos[1] = raw_pos[0]
         # converts a player number to a player object
         player = self.lookup_player(player_num)
-        # Ensures the game has not been won
-        if self._game_won:
-            print("The game is over!")
-            return False
-        # Ensures it is the proper turn
-        if not self.validate_turn(player):
-            return False
-        # Ensures that the player has fences to place
-        if player.get_fences() < 1:
-            print("You don't have any fences to place!")
-            return False
-        # Ensures that the fence can't be placed outside the game board
-        if direction == "h" and (pos[0] < 1 or pos[0] > 8 or pos[1] < 0 or pos[1] > 8):
-            print("Cannot place the fence outside the game board!")
-            return False
-        if direction == "v" and (pos[0] < 0 or pos[0] > 8 or pos[1] < 1 or pos[1] > 8):
-            print("Cannot place the fence outside the game board!")
+        error, slot, changes = self.fence_error(player, direction, pos)
+        if not self.report(error):
             return False
-        # Ensures that the space doesn't already have a fence in the specified direction
-        if self._fence_board[pos[0]][pos[1]] == direction:
-            print("Cannot place overlapping fences")
-            return False
-        # Ensures that the space doesn't already have both vertical and horizontal fences
-        if self._fence_board[pos[0]][pos[1]] == "vh":
-            print("Cannot place overlapping fences")
-            return False
-        # If the fence placement is valid, adds the fence
-        if self._fence_board[pos[0]][pos[1]] == 0:
-            self._fence_board[pos[0]][pos[1]] = direction
+        # If the fence placement is valid, adds the fence and removes a fence from the player
+        self.add_fence_slot(self._players.index(player), slot, changes)
+        # Signify the placement was successful
+        self.announce(player.get_name() + " currently has " + str(player.get_fences()) + " fences remaining!")
+        self._moves.append(tables.pawn_moves + slot)
+        self.make_move(player)
+        return True
+
+    def add_fence_slot(self, index, slot, changes):
+        """Adds a fence to the board on behalf of a player
+        Parameters: Index of the player in turn order (counting from 0), index into the fence slot table,
+        distance changes from fence_path_changes
+        Returns: None
+        Note: Updates the fence masks, available slots, open edges, distance fields, the player's fences
+        and the position key
+        """
+        tables = self._tables
+        direction, bit, pos, square_a, square_b = tables.fence_slots[slot]
+        if direction == "h":
+            self._h_fences |= bit
         else:
-            self._fence_board[pos[0]][pos[1]] = "vh"
-        # Remove a fence from the player, and signify the placement was successful
+            self._v_fences |= bit
+        self._available &= ~tables.slot_conflicts[slot]
+        self.close_edge(direction, pos[1], pos[0])
+        for path, path_changes in zip(self._paths, changes):
+            path.apply(path_changes)
+        player = self._players[index]
+        self._key ^= tables.zobrist_fences[slot] ^ tables.zobrist_counts[index][player.get_fences()]
         player.remove_fence()
-        print(player.get_name() + " currently has " + str(player.get_fences()) + " fences remaining!")
+        self._key ^= tables.zobrist_counts[index][player.get_fences()]
+
+    def compute_key(self):
+        """Computes the Zobrist key of the current position from scratch
+        Parameters: None
+        Returns: 64-bit integer covering pawn squares, fences, remaining fences and the player to move
+        Note: Only needed when state is set wholesale, moves update self._key incrementally
+        """
+        tables = self._tables
+        key = tables.zobrist_turns[self._players.index(self._current_player)]
+        for index, player in enumerate(self._players):
+            key ^= tables.zobrist_pawns[index][self.get_pawn_square(index)]
+            key ^= tables.zobrist_counts[index][player.get_fences()]
+        for slot, (direction, bit, pos, square_a, square_b) in enumerate(tables.fence_slots):
+            if (self._h_fences if direction == "h" else self._v_fences) & bit:
+                key ^= tables.zobrist_fences[slot]
+        return key
+
+    def to_state(self):
+        """Packs the position into a tuple of integers
+        Parameters: None
+        Returns: (packed pawn squares, horizontal fence mask, vertical fence mask,
+        fences left for each player in turn order, number of the player to move, number of the winner or 0)
+        Note: Small and cheap to pickle, for handing positions to other processes. The standard game
+        gives a 7-tuple
+        """
+        winner = self._players.index(self._winner) + 1 if self._winner is not None else 0
+        return ((self._pawns, self._h_fences, self._v_fences)
+                + tuple(player.get_fences() for player in self._players)
+                + (self.get_current_player_num(), winner))
+
+    def load_state(self, state):
+        """Replaces the position with one packed by to_state
+        Parameters: Tuple returned by to_state for a game of the same configuration
+        Returns: None
+        Note: Rebuilds the occupancy mask, open edges, distance fields and position key,
+        and drops any push frames in use. The move log starts over empty
+        """
+        tables = self._tables
+        pawns, h_fences, v_fences = state[:3]
+        player_num, winner = state[-2:]
+        self._pawns = pawns
+        self._occupied = 0
+        for index in range(len(self._players)):
+            square = self.get_pawn_square(index)
+            self._occupied |= 1 << square
+            self._players[index].get_pawn().set_pos(tables.positions[square])
+        self._h_fences = h_fences
+        self._v_fences = v_fences
+        self._available = self.compute_available()
+        self._open[:] = [self.open_directions(square) for square in range(tables.squares)]
+        fields = self.probe_distances(h_fences, v_fences)
+        if fields is None:
+            for path in self._paths:
+                path.rebuild()
+            self.store_distances()
+        else:
+            for path, field in zip(self._paths, fields):
+                path.get_distances()[:] = field
+        for player, fences in zip(self._players, state[3:-2]):
+            player.set_fences(fences)
+        self._current_player = self.lookup_player(player_num)
+        self._winner = self.lookup_player(winner) if winner else None
+        self._game_won = self._winner is not None
+        self._depth = 0
+        self._moves = []
+        self._key = self.compute_key()
+
+    def snapshot(self):
+        """Packs the position into a fixed-size byte string
+        Parameters: None
+        Returns: Bytes holding the pawn squares, fence masks, fence counts, player to move and winner,
+        SNAPSHOT_SIZE of them for the standard game
+        Note: Equal positions give equal snapshots, so they can be compared, hashed and used as dict keys.
+        The move log, push frames and the configuration of the game aren't included
+        """
+        tables = self._tables
+        state = self.to_state()
+        players = len(self._players)
+        squares = [(state[0] >> (index * PAWN_BITS)) & PAWN_MASK for index in range(players)]
+        return tables.snapshot_format.pack(*squares, state[1].to_bytes(tables.mask_bytes, "little"),
+                                           state[2].to_bytes(tables.mask_bytes, "little"),
+                                           *state[3:-2], state[-1] << 4 | state[-2])
+
+    @staticmethod
+    def from_snapshot(snapshot, quiet=False, size=BOARD_SIZE, players=2, fences=None):
+        """Creates a game holding a position packed by snapshot
+        Parameters: Bytes returned by snapshot, whether the new game is quiet, and the board size,
+        player count and starting fences of the game the snapshot was taken from
+        Returns: A new QuoridorGame object
+        """
+        game = QuoridorGame(quiet, size, players, fences)
+        fields = game._tables.snapshot_format.unpack(snapshot)
+        pawns = 0
+        for index in range(players):
+            pawns |= fields[index] << (index * PAWN_BITS)
+        game.load_state((pawns, int.from_bytes(fields[players], "little"),
+                         int.from_bytes(fields[players + 1], "little"))
+                        + fields[players + 2:-1] + (fields[-1] & 15, fields[-1] >> 4))
+        return game
+
+    def get_config(self):
+        """Returns the configuration the game was created with
+        Parameters: None
+        Returns: Tuple of (board size, number of players, fences each player started with)
+        """
+        return self._tables.size, self._tables.players, self._tables.fences
+
+    def get_tables(self):
+        """Returns the precomputed tables of the game's configuration
+        Parameters: None
+        Returns: BoardTables object, shared with every game of the same configuration
+        """
+        return self._tables
+
+    def get_moves(self):
+        """Returns the move log of the game
+        Parameters: None
+        Returns: List of the move codes played so far, in order
+        Note: Pawn moves are coded as their target square, fences as the number of squares + their fence slot index
+        """
+        return list(self._moves)
+
+    def get_key(self):
+        """Returns the Zobrist key of the current position
+        Parameters: None
+        Returns: 64-bit integer covering pawn squares, fences, remaining fences and the player to move
+        """
+        return self._key
+
+    def pawn_move_squares(self, index):
+        """Generates the squares a pawn can move to from the jump table
+        Parameters: Index of the player in turn order (counting from 0)
+        Returns: List of target squares (row * size + col)
+        Note: Does not check whose turn it is or whether the game is over
+        """
+        return pawn_targets(self._open, self._occupied, self.get_pawn_square(index), self._tables.jumps)
+
+    def legal_pawn_moves(self, player_num):
+        """Lists every position the player's pawn can legally move to
+        Parameters: The integer number associated with a player
+        Returns: List of (x, y) positions in the notation accepted by move_pawn
+        Note: Empty if the game is over or it isn't the player's turn. Nothing is printed or changed
+        """
+        size = self._tables.size
+        player = self.lookup_player(player_num)
+        if self._game_won or self._current_player != player:
+            return []
+        return [(square % size, square // size)
+                for square in self.pawn_move_squares(self._players.index(player))]
+
+    def legal_fence_placements(self, player_num):
+        """Lists every fence the player can legally place
+        Parameters: The integer number associated with a player
+        Returns: List of (direction, (x, y)) pairs in the notation accepted by place_fence
+        Note: Empty if the game is over, it isn't the player's turn, or the player has no fences left
+        """
+        tables = self._tables
+        player = self.lookup_player(player_num)
+        if self._game_won or self._current_player != player or player.get_fences() < 1:
+            return []
+        return [(tables.fence_slots[slot][0], tables.fence_slots[slot][2]) for slot in self.fence_move_slots()]
+
+    def fence_move_slots(self, slots=None):
+        """Generates the fence slots that are empty and leave every pawn a path to its goal
+        Parameters: Optional iterable of fence slot indexes to choose from (every slot by default)
+        Returns: List of indexes into the fence slot table
+        Note: Does not check whose turn it is or how many fences the player has left
+        """
+        fence_slots = self._tables.fence_slots
+        available = self._available
+        legal = []
+        if slots is None:
+            # Walks the set bits of the available slots, lowest first
+            while available:
+                low = available & -available
+                available ^= low
+                slot = low.bit_length() - 1
+                if self.fence_path_changes(fence_slots[slot][3], fence_slots[slot][4]) is not None:
+                    legal.append(slot)
+        else:
+            for slot in slots:
+                if (available >> slot) & 1 \
+                        and self.fence_path_changes(fence_slots[slot][3], fence_slots[slot][4]) is not None:
+                    legal.append(slot)
+        return legal
+
+    def compute_available(self):
+        """Works out which fence slots can still take a fence from the fence masks
+        Parameters: None
+        Returns: Bitmask of slot indexes
+        Note: Only needed when state is set wholesale, placing and taking back fences update self._available
+        """
+        tables = self._tables
+        available = tables.all_slots
+        for slot, (direction, bit, pos, square_a, square_b) in enumerate(tables.fence_slots):
+            if (self._h_fences if direction == "h" else self._v_fences) & bit:
+                available &= ~tables.slot_conflicts[slot]
+        return available
+
+    def get_available_slots(self):
+        """Returns the fence slots that can still take a fence
+        Parameters: None
+        Returns: Bitmask with bit n set if FENCE_SLOTS[n] is free of conflicting fences
+        Note: A free slot can still be illegal if the fence would cut a pawn off from its goal side
+        """
+        return self._available
+
+    def get_current_player_num(self):
+        """Returns the number of the player whose turn it is
+        Parameters: None
+        Returns: The integer number associated with the current player (counting from 1)
+        """
+        return self._players.index(self._current_player) + 1
+
+    @staticmethod
+    def from_state(state, quiet=False, size=BOARD_SIZE, fences=None):
+        """Creates a game holding a position packed by to_state
+        Parameters: Tuple returned by to_state, whether the new game is quiet, and the board size and
+        starting fences of the game the state was taken from
+        Returns: A new QuoridorGame object
+        """
+        game = QuoridorGame(quiet, size, len(state) - 5, fences)
+        game.load_state(state)
+        return game
+
+    def is_game_over(self):
+        """Determines if a player has already won the game
+        Parameters: None
+        Returns: True if the game is over / False if it is still being played
+        """
+        return self._game_won
+
+    def play(self, move):
+        """Plays a move code for the current player through move_pawn or place_fence
+        Parameters: Move code from legal_moves
+        Returns: True if the move was accepted / False if it was rejected
+        Note: Goes through the normal validation, so engines can't play a move a person couldn't
+        """
+        tables = self._tables
+        player_num = self.get_current_player_num()
+        if move < tables.pawn_moves:
+            row, col = tables.positions[move]
+            return self.move_pawn(player_num, (col, row))
+        direction, bit, pos = tables.fence_slots[move - tables.pawn_moves][:3]
+        return self.place_fence(player_num, direction, pos)
+
+    def legal_moves(self, slots=None):
+        """Lists every legal move of the current player as move codes for push
+        Parameters: Optional iterable of fence slot indexes to limit fence placements to
+        Returns: List of move codes, pawn moves first
+        Note: Pawn moves are coded as their target square, fences as the number of squares + their fence slot index
+        """
+        tables = self._tables
+        if self._game_won:
+            return []
+        player = self._current_player
+        moves = self.pawn_move_squares(self._players.index(player))
+        if player.get_fences() > 0:
+            moves.extend(tables.pawn_moves + slot for slot in self.fence_move_slots(slots))
+        return moves
+
+    def get_open_edges(self):
+        """Returns the directions a pawn can leave each square in without crossing a fence
+        Parameters: None
+        Returns: List of DIRECTION_BITS combinations indexed by square
+        Note: The list is kept up to date by the game and must not be modified
+        """
+        return self._open
+
+    def get_distance_field(self, player_num):
+        """Returns the distance from every square to a player's goal side
+        Parameters: The integer number associated with a player
+        Returns: List of distances indexed by square, UNREACHABLE where fences cut a square off
+        Note: The list is kept up to date by the game and must not be modified
+        """
+        return self._paths[self._players.index(self.lookup_player(player_num))].get_distances()
+
+    def push(self, move):
+        """Plays a move for the current player and records what is needed to take it back
+        Parameters: Move code from legal_moves
+        Returns: None
+        Note: The move is assumed to be legal and nothing is printed. Undo frames are kept
+        between calls, so searching down and back up a line doesn't allocate new game state
+        """
+        tables = self._tables
+        if self._depth == len(self._frames):
+            self._frames.append(MoveFrame(tables.squares, len(self._players)))
+        frame = self._frames[self._depth]
+        self._depth += 1
+        player = self._current_player
+        index = self._players.index(player)
+        frame.move = move
+        frame.player = player
+        frame.winner = self._winner
+        frame.game_won = self._game_won
+        frame.key = self._key
+        if move < tables.pawn_moves:
+            # Remembers where the pawn came from
+            frame.origin = self.get_pawn_square(index)
+        else:
+            # Remembers the fence masks, open edges and distances the fence changes
+            square_a, square_b = tables.fence_slots[move - tables.pawn_moves][3:5]
+            frame.h_fences = self._h_fences
+            frame.v_fences = self._v_fences
+            frame.available = self._available
+            frame.open_a = self._open[square_a]
+            frame.open_b = self._open[square_b]
+            for distances, path in zip(frame.distances, self._paths):
+                distances[:] = path.get_distances()
+        self.apply_move(move)
+
+    def apply_move(self, move):
+        """Plays a move for the current player without checking it or keeping a way to take it back
+        Parameters: Move code from legal_moves
+        Returns: None
+        Note: Used by push and for replaying trusted move logs. Nothing is printed
+        """
+        tables = self._tables
+        player = self._current_player
+        index = self._players.index(player)
+        if move < tables.pawn_moves:
+            self.set_pawn_square(index, move)
+            if (tables.goal_masks[index] >> move) & 1:
+                self._game_won = True
+                self._winner = player
+        else:
+            slot = move - tables.pawn_moves
+            direction, bit, pos, square_a, square_b = tables.fence_slots[slot]
+            if self._distance_cache is None:
+                self.add_fence_slot(index, slot, self.fence_path_changes(square_a, square_b))
+            else:
+                # Takes the distances of the new layout from the cache, or repairs them and stores them
+                fields = self.probe_distances(self._h_fences | bit if direction == "h" else self._h_fences,
+                                              self._v_fences | bit if direction == "v" else self._v_fences)
+                if fields is None:
+                    self.add_fence_slot(index, slot, self.fence_path_changes(square_a, square_b))
+                    self.store_distances()
+                else:
+                    self.add_fence_slot(index, slot, ())
+                    for path, field in zip(self._paths, fields):
+                        path.get_distances()[:] = field
+        self._moves.append(move)
         self.make_move(player)
-        return True
+
+    def pop(self):
+        """Takes back the last move played with push
+        Parameters: None
+        Returns: The move code that was taken back
+        """
+        tables = self._tables
+        self._depth -= 1
+        self._moves.pop()
+        frame = self._frames[self._depth]
+        move = frame.move
+        player = frame.player
+        self._current_player = player
+        self._winner = frame.winner
+        self._game_won = frame.game_won
+        if move < tables.pawn_moves:
+            self.set_pawn_square(self._players.index(player), frame.origin)
+        else:
+            square_a, square_b = tables.fence_slots[move - tables.pawn_moves][3:5]
+            self._h_fences = frame.h_fences
+            self._v_fences = frame.v_fences
+            self._available = frame.available
+            self._open[square_a] = frame.open_a
+            self._open[square_b] = frame.open_b
+            for path, distances in zip(self._paths, frame.distances):
+                path.get_distances()[:] = distances
+            player.add_fence()
+        self._key = frame.key
+        return move
+
+    def set_distance_cache(self, cache):
+        """Shares the distance fields of fence layouts with other games through a cache
+        Parameters: DistanceCache or SharedDistanceCache built for the game's configuration, or None to stop
+        Returns: None
+        Note: Layouts found in the cache skip the breadth first search of load_state and the repair
+        of moves played with push or apply_move. Rule checks still repair the distances themselves
+        """
+        self._distance_cache = cache
+
+    def probe_distances(self, h_fences, v_fences):
+        """Looks up the distance fields of a fence layout in the distance cache
+        Parameters: Horizontal and vertical fence masks
+        Returns: Tuple of every player's distances in turn order, or None if there is no cache or
+        the layout isn't in it
+        """
+        if self._distance_cache is None:
+            return None
+        return self._distance_cache.probe(h_fences, v_fences)
+
+    def store_distances(self):
+        """Stores the distance fields of the current fence layout in the distance cache, if there is one
+        Parameters: None
+        Returns: None
+        """
+        if self._distance_cache is not None:
+            self._distance_cache.store(self._h_fences, self._v_fences,
+                                       tuple(bytes(path.get_distances()) for path in self._paths))
+
+    def fence_path_changes(self, square_a, square_b):
+        """Works out how fencing the edge between two squares changes each player's distances
+        Parameters: The two squares on either side of the fence
+        Returns: Tuple of distance changes per player, as returned by PathIndex.repair,
+        or None if the fence would leave a pawn with no path to its goal side
+        """
+        changes = tuple(path.repair(square_a, square_b) for path in self._paths)
+        for index, path_changes in enumerate(changes):
+            if path_changes.get(self.get_pawn_square(index)) == UNREACHABLE:
+                return None
+        return changes
+
+    def fence_blocks_path(self, direction, raw_pos):
+        """Determines if a fence would cut a pawn off from its goal side
+        Parameters: Fence direction, fence position entered by the user
+        Returns: True if the fence would block a pawn's last path / False if it would not
+        Note: Only meaningful for an empty fence cell inside the board. Nothing is changed
+        """
+        tables = self._tables
+        slot = tables.slot_lookup.get((direction, tuple(raw_pos)))
+        if slot is None:
+            return False
+        return self.fence_path_changes(tables.fence_slots[slot][3], tables.fence_slots[slot][4]) is None
+
+    def shortest_path(self, player_num):
+        """Finds one shortest route from a player's pawn to its goal side, ignoring other pawns
+        Parameters: The integer number associated with a player
+        Returns: List of squares (row * size + col) from the pawn's square to the goal side
+        """
+        index = self._players.index(self.lookup_player(player_num))
+        return self._paths[index].shortest_path(self.get_pawn_square(index))
+
+    def get_distance(self, player_num):
+        """Returns how many steps a player's pawn is from its goal side, ignoring other pawns
+        Parameters: The integer number associated with a player
+        Returns: The length of the shortest fence-free path to the goal side
+        """
+        index = self._players.index(self.lookup_player(player_num))
+        return self._paths[index].get_distance(self.get_pawn_square(index))
+
+    def get_board(self):
+        """Builds the pawn board as a nested list from the bitboards
+        Parameters: None
+        Returns: A size x size list holding player names on occupied squares and 0 elsewhere
+        """
+        size = self._tables.size
+        board = [[0 for j in range(size)] for i in range(size)]
+        for index, player in enumerate(self._players):
+            row, col = divmod(self.get_pawn_square(index), size)
+            board[row][col] = player.get_name()
+        return board
+
+    def get_fence_board(self):
+        """Builds the fence board as a nested list from the fence bitmasks
+        Parameters: None
+        Returns: A (size + 1) x (size + 1) list holding "h", "v", "vh" or 0 for each cell
+        """
+        fence_size = self._tables.fence_size
+        fence_board = [[0 for j in range(fence_size)] for i in range(fence_size)]
+        for row in range(fence_size):
+            for col in range(fence_size):
+                bit = 1 << (row * fence_size + col)
+                if self._h_fences & bit and self._v_fences & bit:
+                    fence_board[row][col] = "vh"
+                elif self._h_fences & bit:
+                    fence_board[row][col] = "h"
+                elif self._v_fences & bit:
+                    fence_board[row][col] = "v"
+        return fence_board
 
     def draw_board(self):
         """Draws the position of pawns on the game board
@@ -419,7 +1579,7 @@ class QuoridorGame:
         Note: Used for debugging and not gameplay
         """
         print("Game Board:")
-        for element in self._board:
+        for element in self.get_board():
             print(element)
 
     def draw_fence_board(self):
@@ -429,7 +1589,7 @@ class QuoridorGame:
         Note: Used for debugging and not gameplay
         """
         print("Fence Board:")
-        for element in self._fence_board:
+        for element in self.get_fence_board():
             print(element)
 
     def is_winner(self, player_num):
@@ -444,17 +1604,47 @@ class QuoridorGame:
             return False
 
 
+class MoveFrame:
+    """Everything push changes on a QuoridorGame, so pop can restore it
+    Frames are created once per search depth and then reused
+    """
+    __slots__ = ("move", "player", "winner", "game_won", "key", "origin", "h_fences", "v_fences",
+                 "available", "open_a", "open_b", "distances")
+
+    def __init__(self, squares=BOARD_SIZE * BOARD_SIZE, players=2):
+        """Initializes an empty MoveFrame
+        Parameters: Number of squares on the board, number of players
+        Returns: None
+        """
+        self.move = 0
+        self.player = None
+        self.winner = None
+        self.game_won = False
+        self.key = 0
+        # Pawn moves only need the square the pawn left
+        self.origin = 0
+        # Fence placements need the fence masks, available slots, the two open-edge entries and every distance field
+        self.h_fences = 0
+        self.v_fences = 0
+        self.available = 0
+        self.open_a = 0
+        self.open_b = 0
+        self.distances = tuple([0] * squares for player in range(players))
+
+
 class Player:
-    """Object representing one of the two players
+    """Object representing one of the players
     Contains references to the pawn associated with a given player, and the player fence count
     Needs to be reference by QuoridorGame objects for information about pawns/fences
     """
-    def __init__(self, pawn, name):
+    __slots__ = ("_fences", "_pawn", "_name")
+
+    def __init__(self, pawn, name, fences=STARTING_FENCES):
         """Initializes a Player object
-        Parameters: Pawn object associated with the player, name of the player
+        Parameters: Pawn object associated with the player, name of the player, fences to start with
         Returns: None
         """
-        self._fences = 10
+        self._fences = fences
         self._pawn = pawn
         self._name = name
 
@@ -487,11 +1677,28 @@ class Player:
         """
         self._fences -= 1
 
+    def set_fences(self, fences):
+        """Sets the number of fences the player has remaining
+        Parameters: The number of fences
+        Returns: None
+        Note: Used when restoring a saved position
+        """
+        self._fences = fences
+
+    def add_fence(self):
+        """Gives one fence back to the Player when a placement is taken back
+        Parameters: None
+        Returns: None
+        """
+        self._fences += 1
+
 
 class Pawn:
     """Represents a Pawn within the game
     Contains functions for handling pawn position
     Must be referenced by Player and Quoridor game objects for pawn positioning"""
+    __slots__ = ("_pos",)
+
     def __init__(self, pos):
         """Initializes a Pawn
         Parameters: Position of the pawn
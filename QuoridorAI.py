@@ -0,0 +1,313 @@
+import time
+
+from Transposition import TranspositionTable, EXACT, LOWER_BOUND, UPPER_BOUND, NO_MOVE
+from QuoridorBook import WIN, LOSS
+
+# Score of a won position, reduced by the number of plies needed to reach it
+WIN_SCORE = 100000
+# Evaluation weights for each step of shortest-path advantage and each spare fence
+PATH_WEIGHT = 10
+FENCE_WEIGHT = 3
+# Deepest ply the search can reach, which also bounds the number of plies in a win score
+MAX_PLY = 255
+# Nodes searched between checks of the time and node budgets
+CHECK_INTERVAL = 256
+# Score of a position repeated on the line being searched, going round in a circle gains nothing
+REPETITION_SCORE = 0
+
+
+def score_to_table(score, ply):
+    """Converts a win or loss score from distance-to-root to distance-to-position for storage
+    Parameters: Score, plies from the root
+    Returns: The score to store in the transposition table
+    """
+    if score >= WIN_SCORE - MAX_PLY:
+        return score + ply
+    if score <= MAX_PLY - WIN_SCORE:
+        return score - ply
+    return score
+
+
+def score_from_table(score, ply):
+    """Converts a stored win or loss score back to distance-to-root
+    Parameters: Stored score, plies from the root
+    Returns: The score as seen from the current search
+    """
+    if score >= WIN_SCORE - MAX_PLY:
+        return score - ply
+    if score <= MAX_PLY - WIN_SCORE:
+        return score + ply
+    return score
+
+
+class SearchTimeout(Exception):
+    """Raised inside the search when the time or node budget runs out"""
+
+
+class AIPlayer:
+    """Computer player that picks moves for one player of a QuoridorGame
+    Uses iterative deepening negamax with alpha-beta pruning, a transposition table and killer moves,
+    and evaluates positions by the difference in shortest-path distance and remaining fences.
+    An opening book and an endgame tablebase can answer known positions without searching
+    Needs to communicate with a QuoridorGame object, which it searches with push/pop and then
+    plays through the normal move_pawn/place_fence validation
+    """
+    def __init__(self, player_num, time_limit=1.0, node_limit=None, max_depth=64,
+                 table_bytes=16 * 1024 * 1024, path_fences_only=True, book=None, tablebase=None):
+        """Initializes an AIPlayer
+        Parameters: Integer associated with the player to move for, seconds allowed per move,
+        optional node budget per move, deepest iteration to search, transposition table size in bytes,
+        whether to limit fences to those bordering either pawn's shortest path,
+        and optional OpeningBook and Tablebase objects
+        Returns: None
+        """
+        self._player_num = player_num
+        self._time_limit = time_limit
+        self._node_limit = node_limit
+        self._max_depth = min(max_depth, MAX_PLY)
+        self._path_fences_only = path_fences_only
+        self._book = book
+        self._tablebase = tablebase
+        self._table = TranspositionTable(table_bytes)
+        # Two killer moves per ply, refreshed by moves that caused a beta cutoff
+        self._killers = [[NO_MOVE, NO_MOVE] for ply in range(self._max_depth + 1)]
+        self._nodes = 0
+        self._deadline = 0.0
+        # Keys of the positions on the line being searched, from the root down
+        self._line = set()
+        self._stats = {}
+
+    def get_stats(self):
+        """Returns statistics about the last search
+        Parameters: None
+        Returns: Dict with the chosen move, its score, the completed depth, nodes searched,
+        seconds taken and nodes per second
+        """
+        return dict(self._stats)
+
+    def play(self, game):
+        """Chooses a move and plays it on the game
+        Parameters: QuoridorGame object
+        Returns: True if a move was played / False if it isn't this player's turn or the game is over
+        """
+        move = self.choose_move(game)
+        if move is None:
+            return False
+        return game.play(move)
+
+    def choose_move(self, game):
+        """Searches the game for the best move within the time and node budgets
+        Parameters: QuoridorGame object
+        Returns: Move code (see QuoridorGame.legal_moves), or None if it isn't this player's turn
+        or the game is over
+        Raises: ValueError for a game with more than two players
+        Note: The game is searched in place with push/pop and is left unchanged
+        """
+        if game.get_config()[1] != 2:
+            raise ValueError("AIPlayer only plays two player games")
+        if game.is_game_over() or game.get_current_player_num() != self._player_num \
+                or not game.legal_moves():
+            return None
+        start = time.perf_counter()
+        known = self.known_move(game)
+        if known is not None:
+            self._stats = {"move": known[0], "score": known[1], "depth": 0, "nodes": 0,
+                           "seconds": time.perf_counter() - start, "nps": 0.0}
+            return known[0]
+        self._deadline = start + self._time_limit
+        self._nodes = 0
+        self._table.new_search()
+        best_move = None
+        best_score = 0
+        depth_done = 0
+        for depth in range(1, self._max_depth + 1):
+            try:
+                score, move = self.search_root(game, depth)
+            except SearchTimeout:
+                break
+            best_move, best_score, depth_done = move, score, depth
+            # A forced win or loss proven within this depth won't change with a deeper search. One further
+            # away may come from a table entry of an earlier search, so deeper iterations still check it
+            if abs(score) >= WIN_SCORE - MAX_PLY and WIN_SCORE - abs(score) <= depth:
+                break
+        # Falls back to the first legal move if not even one iteration finished
+        if best_move is None:
+            best_move = self.generate_moves(game, NO_MOVE, 0)[0]
+        seconds = time.perf_counter() - start
+        self._stats = {"move": best_move, "score": best_score, "depth": depth_done, "nodes": self._nodes,
+                       "seconds": seconds, "nps": self._nodes / seconds if seconds > 0 else 0.0}
+        return best_move
+
+    def known_move(self, game):
+        """Looks the position up in the opening book and the endgame tablebase
+        Parameters: QuoridorGame object
+        Returns: (move, score) if either knows a legal move for the position, otherwise None
+        """
+        if self._book is not None:
+            entry = self._book.probe(game)
+            if entry is not None and entry[0] in game.legal_moves():
+                return entry[0], 0
+        if self._tablebase is not None:
+            entry = self._tablebase.probe(game)
+            if entry is not None and entry[1] != 0 and entry[0] in game.legal_moves(()):
+                return entry[0], self.tablebase_score(entry, 0)
+        return None
+
+    def tablebase_score(self, entry, ply):
+        """Converts a tablebase entry to a search score
+        Parameters: (move, result, plies) from Tablebase.probe, plies from the root
+        Returns: Win or loss score for the player to move, or 0 for a draw
+        """
+        move, result, plies = entry
+        if result == WIN:
+            return WIN_SCORE - min(ply + plies, MAX_PLY)
+        if result == LOSS:
+            return min(ply + plies, MAX_PLY) - WIN_SCORE
+        return 0
+
+    def search_root(self, game, depth):
+        """Searches every move at the root to a fixed depth
+        Parameters: QuoridorGame object, depth in plies
+        Returns: (score, move) of the best move found
+        """
+        key = game.get_key()
+        entry = self._table.probe(key)
+        table_move = entry[3] if entry is not None else NO_MOVE
+        alpha = -WIN_SCORE - 1
+        best_move = None
+        self._line = {key}
+        for move in self.generate_moves(game, table_move, 0):
+            game.push(move)
+            try:
+                score = -self.negamax(game, depth - 1, -WIN_SCORE - 1, -alpha, 1)
+            finally:
+                game.pop()
+            if best_move is None or score > alpha:
+                alpha = score
+                best_move = move
+        self._table.store(game.get_key(), depth, alpha, EXACT, best_move)
+        return alpha, best_move
+
+    def negamax(self, game, depth, alpha, beta, ply):
+        """Scores a position from the point of view of the player to move
+        Parameters: QuoridorGame object, remaining depth, alpha and beta bounds, plies from the root
+        Returns: The score of the position
+        """
+        self._nodes += 1
+        if self._nodes % CHECK_INTERVAL == 0:
+            if time.perf_counter() > self._deadline \
+                    or self._node_limit is not None and self._nodes >= self._node_limit:
+                raise SearchTimeout()
+        # The previous move won the game, so the player to move has lost
+        if game.is_game_over():
+            return ply - WIN_SCORE
+        # Pawn races with no fences left are looked up rather than searched
+        if self._tablebase is not None:
+            entry = self._tablebase.probe(game)
+            if entry is not None:
+                return self.tablebase_score(entry, ply)
+        key = game.get_key()
+        if key in self._line:
+            return REPETITION_SCORE
+        if depth == 0 or ply >= self._max_depth:
+            return self.evaluate(game)
+        # Uses the stored result if it was searched at least as deeply. The moves at the root are
+        # never decided by a stored win or loss, which may have been found along a different line
+        original_alpha = alpha
+        table_move = NO_MOVE
+        entry = self._table.probe(key)
+        if entry is not None:
+            score, entry_depth, flag, table_move = entry
+            score = score_from_table(score, ply)
+            if entry_depth >= depth and (ply > 1 or abs(score) < WIN_SCORE - MAX_PLY):
+                if flag == EXACT:
+                    return score
+                if flag == LOWER_BOUND and score >= beta:
+                    return score
+                if flag == UPPER_BOUND and score <= alpha:
+                    return score
+        moves = self.generate_moves(game, table_move, ply)
+        # A pawn boxed in with no fences to place can't move, so the position is scored as it stands
+        if not moves:
+            return self.evaluate(game)
+        best_score = -WIN_SCORE - 1
+        best_move = NO_MOVE
+        self._line.add(key)
+        for move in moves:
+            game.push(move)
+            try:
+                score = -self.negamax(game, depth - 1, -beta, -alpha, ply + 1)
+            finally:
+                game.pop()
+            if score > best_score:
+                best_score = score
+                best_move = move
+            if score > alpha:
+                alpha = score
+            if alpha >= beta:
+                # Remembers the refutation so sibling positions try it early
+                killers = self._killers[ply]
+                if killers[0] != move:
+                    killers[1] = killers[0]
+                    killers[0] = move
+                break
+        self._line.discard(key)
+        if best_score <= original_alpha:
+            flag = UPPER_BOUND
+        elif best_score >= beta:
+            flag = LOWER_BOUND
+        else:
+            flag = EXACT
+        self._table.store(key, depth, score_to_table(best_score, ply), flag, best_move)
+        return best_score
+
+    def evaluate(self, game):
+        """Scores a quiet position from the point of view of the player to move
+        Parameters: QuoridorGame object
+        Returns: Shortest-path advantage and spare fence advantage, weighted
+        """
+        player_num = game.get_current_player_num()
+        opponent_num = 3 - player_num
+        path_score = game.get_distance(opponent_num) - game.get_distance(player_num)
+        fence_score = game.lookup_player(player_num).get_fences() - game.lookup_player(opponent_num).get_fences()
+        return path_score * PATH_WEIGHT + fence_score * FENCE_WEIGHT
+
+    def generate_moves(self, game, table_move, ply):
+        """Generates the legal moves of the player to move, most promising first
+        Parameters: QuoridorGame object, transposition table move, plies from the root
+        Returns: List of move codes: table move, killer moves, pawn moves towards the goal,
+        fences along the opponent's shortest path, then other fences
+        Note: When fences are limited to the pawns' shortest paths, only fences bordering a square on
+        either path are generated. Other fences can't change either distance on the next ply
+        """
+        tables = game.get_tables()
+        player_num = game.get_current_player_num()
+        opponent_path = game.shortest_path(3 - player_num)
+        own_path = game.shortest_path(player_num)
+        opponent_slots = set()
+        for square in opponent_path:
+            opponent_slots.update(tables.square_slots[square])
+        if self._path_fences_only:
+            candidates = set(opponent_slots)
+            for square in own_path:
+                candidates.update(tables.square_slots[square])
+            moves = game.legal_moves(sorted(candidates))
+        else:
+            moves = game.legal_moves()
+        killers = self._killers[ply]
+        next_square = own_path[1] if len(own_path) > 1 else -1
+        ranked = []
+        for move in moves:
+            if move == table_move:
+                rank = 0
+            elif move == killers[0] or move == killers[1]:
+                rank = 1
+            elif move < tables.pawn_moves:
+                rank = 2 if move == next_square else 3
+            elif move - tables.pawn_moves in opponent_slots:
+                rank = 4
+            else:
+                rank = 5
+            ranked.append((rank, move))
+        ranked.sort()
+        return [move for rank, move in ranked]
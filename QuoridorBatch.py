@@ -0,0 +1,262 @@
+import numpy as np
+
+from Quoridor import (QuoridorGame, BOARD_SIZE, GOAL_ROWS, STARTING_FENCES, UNREACHABLE, PAWN_MOVES,
+                      NEIGHBOURS, JUMP_TABLE, FENCE_SLOTS, DIRECTION_BITS, PERPENDICULAR, UP, DOWN, LEFT, RIGHT)
+from quoridor.selfplay import FENCE_RATE, WALK_BIAS, MAX_PLIES, run_batches
+
+SQUARES = BOARD_SIZE * BOARD_SIZE
+
+
+def build_edge_slots():
+    """Finds the fence slot separating each square from its neighbour in each direction
+    Parameters: None
+    Returns: (SQUARES, 4) array of indexes into FENCE_SLOTS, -1 along the border of the board
+    """
+    edge_slots = np.full((SQUARES, 4), -1, dtype=np.intp)
+    for slot, (direction, bit, pos, square_a, square_b) in enumerate(FENCE_SLOTS):
+        if direction == "h":
+            edge_slots[square_a, DOWN] = slot
+            edge_slots[square_b, UP] = slot
+        else:
+            edge_slots[square_a, RIGHT] = slot
+            edge_slots[square_b, LEFT] = slot
+    return edge_slots
+
+
+# Neighbour and jump tables as arrays, with off-board squares pointing back at the square itself
+# so they can be gathered safely (the open-edge bits already rule those moves out)
+NEIGHBOUR_ARRAY = np.array([[square if neighbour == -1 else neighbour for neighbour in entry]
+                            for square, entry in enumerate(NEIGHBOURS)], dtype=np.intp)
+JUMP_ARRAY = np.array([[[square if target == -1 else target for target in move] for move in entry]
+                       for square, entry in enumerate(JUMP_TABLE)], dtype=np.intp)
+DIRECTION_ARRAY = np.array(DIRECTION_BITS, dtype=np.uint8)
+EDGE_SLOTS = build_edge_slots()
+SLOT_SQUARES = np.array([(slot[3], slot[4]) for slot in FENCE_SLOTS], dtype=np.intp)
+SLOT_HORIZONTAL = np.array([slot[0] == "h" for slot in FENCE_SLOTS])
+GOAL_ARRAY = np.array(GOAL_ROWS, dtype=np.intp)
+START_OPEN = np.array(QuoridorGame().get_open_edges(), dtype=np.uint8)
+
+
+def distance_fields(open_edges, goal_row):
+    """Computes the distance from every square to a goal row for a batch of boards
+    Parameters: (games, SQUARES) array of open-edge bits, goal row shared by the batch or one per game
+    Returns: (games, SQUARES) array of distances, UNREACHABLE where fences cut a square off
+    Note: Relaxes all boards together until no distance changes, ignoring pawns like PathIndex
+    """
+    games = open_edges.shape[0]
+    rows = np.arange(SQUARES) // BOARD_SIZE
+    distances = np.full((games, SQUARES), UNREACHABLE, dtype=np.int16)
+    goals = np.broadcast_to(rows[None, :] == np.asarray(goal_row).reshape(-1, 1), distances.shape)
+    distances[goals] = 0
+    while True:
+        best = distances
+        for direction in range(4):
+            through = distances[:, NEIGHBOUR_ARRAY[:, direction]] + 1
+            best = np.where(open_edges & DIRECTION_ARRAY[direction], np.minimum(best, through), best)
+        best = np.minimum(best, UNREACHABLE)
+        if np.array_equal(best, distances):
+            return distances
+        distances = best
+
+
+class BatchSimulator:
+    """Plays many self-play games in lockstep on array-backed state
+    Each game is a row of the pawn, fence count and open-edge arrays. Every step, the player to move in
+    every running game either fences the opponent's next shortest-path step or moves its pawn, and all
+    legality and win checks are done on whole arrays at once
+    Follows the same rules as QuoridorGame, and can record move codes to replay games through it.
+    QuoridorGame has no pass, so a game where the player to move has no pawn move ends undecided
+    """
+    def __init__(self, games, seed=None, record=False):
+        """Initializes a BatchSimulator with every game at the starting position
+        Parameters: Number of games, random seed, whether to record the move codes of every game
+        Returns: None
+        """
+        self._games = games
+        self._rng = np.random.default_rng(seed)
+        start = QuoridorGame()
+        self._pawns = np.tile(np.array([start.get_pawn_square(0), start.get_pawn_square(1)], dtype=np.intp),
+                              (games, 1))
+        self._fences = np.full((games, 2), STARTING_FENCES, dtype=np.int16)
+        self._open = np.tile(START_OPEN, (games, 1))
+        self._distances = np.stack([distance_fields(self._open, GOAL_ROWS[0]),
+                                    distance_fields(self._open, GOAL_ROWS[1])], axis=1)
+        self._turn = np.zeros(games, dtype=np.intp)
+        self._winner = np.zeros(games, dtype=np.int8)
+        self._plies = np.zeros(games, dtype=np.int32)
+        self._running = np.ones(games, dtype=bool)
+        self._records = [[] for game in range(games)] if record else None
+
+    def get_winners(self):
+        """Returns the winner of every game
+        Parameters: None
+        Returns: Array holding 1 or 2 for finished games and 0 for games still running or undecided
+        """
+        return self._winner.copy()
+
+    def get_plies(self):
+        """Returns the number of plies played in every game
+        Parameters: None
+        Returns: Array of ply counts
+        """
+        return self._plies.copy()
+
+    def get_records(self):
+        """Returns the recorded move codes of every game
+        Parameters: None
+        Returns: List of move code lists, or None if the simulator isn't recording
+        """
+        return self._records
+
+    def run(self, max_plies=MAX_PLIES):
+        """Steps every game until all of them are over or the ply limit is reached
+        Parameters: Ply limit per game
+        Returns: None
+        """
+        while self._running.any() and self._plies.max() < max_plies:
+            self.step()
+
+    def step(self):
+        """Plays one ply in every running game
+        Parameters: None
+        Returns: None
+        """
+        games = np.flatnonzero(self._running)
+        turn = self._turn[games]
+        fenced = self.place_fences(games, turn)
+        movers = games[~fenced]
+        moved = self.move_pawns(movers, self._turn[movers])
+        self._turn[games] = 1 - turn
+        self._plies[games] += 1
+        # Games that ended because the player to move was stuck didn't play this ply
+        self._plies[movers[~moved]] -= 1
+
+    def place_fences(self, games, turn):
+        """Fences the opponent's next shortest-path step in games where the player chooses to
+        Parameters: Indexes of running games, index of the player to move in each
+        Returns: Boolean array marking the games where a fence was placed
+        Note: The fence is put on the board, both distance fields are recomputed, and the fence is taken
+        back again wherever it would leave a pawn without a path
+        """
+        placed = np.zeros(len(games), dtype=bool)
+        tries = (self._fences[games, turn] > 0) & (self._rng.random(len(games)) < FENCE_RATE)
+        if not tries.any():
+            return placed
+        rows = games[tries]
+        mover = turn[tries]
+        opponent = 1 - mover
+        square = self._pawns[rows, opponent]
+        # Finds the open direction leading the opponent one step closer to its goal
+        field = self._distances[rows, opponent]
+        through = field[np.arange(len(rows))[:, None], NEIGHBOUR_ARRAY[square]]
+        edge_open = (self._open[rows, square][:, None] & DIRECTION_ARRAY[None, :]) != 0
+        through = np.where(edge_open, through, UNREACHABLE + 1)
+        slot = EDGE_SLOTS[square, np.argmin(through, axis=1)]
+        # Tries the fence on copies of the boards and keeps it where both pawns can still reach their goal
+        trial = self._open[rows].copy()
+        self.close_slots(trial, slot)
+        field0 = distance_fields(trial, GOAL_ROWS[0])
+        field1 = distance_fields(trial, GOAL_ROWS[1])
+        index = np.arange(len(rows))
+        legal = (field0[index, self._pawns[rows, 0]] < UNREACHABLE) & (field1[index, self._pawns[rows, 1]] < UNREACHABLE)
+        kept = rows[legal]
+        self._open[kept] = trial[legal]
+        self._distances[kept, 0] = field0[legal]
+        self._distances[kept, 1] = field1[legal]
+        self._fences[kept, mover[legal]] -= 1
+        placed[np.flatnonzero(tries)[legal]] = True
+        if self._records is not None:
+            for game, fence in zip(kept, slot[legal]):
+                self._records[game].append(PAWN_MOVES + int(fence))
+        return placed
+
+    def close_slots(self, open_edges, slots):
+        """Removes the open-edge bits crossed by one fence per board
+        Parameters: (boards, SQUARES) array of open-edge bits, fence slot for each board
+        Returns: None
+        """
+        index = np.arange(len(slots))
+        square_a = SLOT_SQUARES[slots, 0]
+        square_b = SLOT_SQUARES[slots, 1]
+        horizontal = SLOT_HORIZONTAL[slots]
+        # Horizontal fences close down from the upper square and up from the lower square,
+        # vertical fences close right from the left square and left from the right square
+        open_edges[index, square_a] &= ~np.where(horizontal, DIRECTION_BITS[DOWN], DIRECTION_BITS[RIGHT]).astype(np.uint8)
+        open_edges[index, square_b] &= ~np.where(horizontal, DIRECTION_BITS[UP], DIRECTION_BITS[LEFT]).astype(np.uint8)
+
+    def move_pawns(self, games, turn):
+        """Moves the pawn of the player to move in each game and checks for a winner
+        Parameters: Indexes of games where the player moves a pawn, index of that player in each
+        Returns: Boolean array marking the games where the pawn moved. The others are ended undecided
+        Note: Candidate squares come from the jump table: for each direction a step, a straight jump, or
+        the two diagonal steps around a pawn with a fence behind it
+        """
+        if len(games) == 0:
+            return np.zeros(0, dtype=bool)
+        count = len(games)
+        index = np.arange(count)
+        square = self._pawns[games, turn]
+        other = self._pawns[games, 1 - turn]
+        open_here = self._open[games, square]
+        targets = np.empty((count, 16), dtype=np.intp)
+        legal = np.zeros((count, 16), dtype=bool)
+        for direction in range(4):
+            bit = DIRECTION_BITS[direction]
+            first, second = PERPENDICULAR[direction]
+            middle, landing, side_a, side_b = (JUMP_ARRAY[square, direction, part] for part in range(4))
+            open_middle = self._open[games, middle]
+            can_step = (open_here & bit) != 0
+            blocked_by_pawn = can_step & (middle == other)
+            behind_open = (open_middle & bit) != 0
+            column = direction * 4
+            targets[:, column:column + 4] = np.stack([middle, landing, side_a, side_b], axis=1)
+            legal[:, column] = can_step & (middle != other)
+            legal[:, column + 1] = blocked_by_pawn & behind_open & (landing != other)
+            legal[:, column + 2] = blocked_by_pawn & ~behind_open & ((open_middle & DIRECTION_BITS[first]) != 0)
+            legal[:, column + 3] = blocked_by_pawn & ~behind_open & ((open_middle & DIRECTION_BITS[second]) != 0)
+        # Prefers the target closest to the goal, or a random legal target
+        noise = self._rng.random((count, 16))
+        field = self._distances[games, turn]
+        distance = field[index[:, None], targets]
+        walk = self._rng.random(count) < WALK_BIAS
+        score = np.where(walk[:, None], distance + noise, noise)
+        score = np.where(legal, score, np.inf)
+        choice = np.argmin(score, axis=1)
+        movable = legal.any(axis=1)
+        target = targets[index, choice]
+        rows = games[movable]
+        self._pawns[rows, turn[movable]] = target[movable]
+        if self._records is not None:
+            for game, move in zip(rows, target[movable]):
+                self._records[game].append(int(move))
+        # Replaces QuoridorGame.check_win with one comparison over the whole batch
+        won = target[movable] // BOARD_SIZE == GOAL_ARRAY[turn[movable]]
+        self._winner[rows[won]] = turn[movable][won] + 1
+        self._running[rows[won]] = False
+        self._running[games[~movable]] = False
+        return movable
+
+
+def simulate_worker(task):
+    """Plays one batch of games in a worker process
+    Parameters: Tuple of (number of games, random seed, ply limit)
+    Returns: Tuple of (games, wins for player one, wins for player two, total plies)
+    """
+    games, seed, max_plies = task
+    simulator = BatchSimulator(games, seed)
+    simulator.run(max_plies)
+    winners = simulator.get_winners()
+    return games, int((winners == 1).sum()), int((winners == 2).sum()), int(simulator.get_plies().sum())
+
+
+def run_selfplay(games, batch_size=1024, processes=None, seed=0, max_plies=MAX_PLIES):
+    """Plays a number of self-play games with this backend, see quoridor.selfplay.run_batches
+    Parameters: Total games, games per batch, worker processes, base random seed, ply limit per game
+    Returns: Dict with games played, wins per player, undecided games, average plies, seconds taken
+    and games per second
+    """
+    return run_batches(simulate_worker, games, batch_size, processes, seed, max_plies)
+
+
+if __name__ == "__main__":
+    print(run_selfplay(10000))
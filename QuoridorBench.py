@@ -0,0 +1,339 @@
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+
+from Quoridor import QuoridorGame, BOARD_SIZE, STARTING_FENCES, PAWN_BITS, FENCE_SLOTS, FENCE_SLOT_LOOKUP, \
+    PAWN_MOVES
+
+# Version of the JSON result format
+RESULT_VERSION = 1
+# Seed and size of the fixed corpus, so every run measures the same games and positions
+CORPUS_SEED = 20211015
+CORPUS_GAMES = 40
+DENSE_GAMES = 10
+# Every this many plies of a corpus game, the position is added to the position corpus
+POSITION_STRIDE = 4
+# Chance a random corpus move is a fence, in normal and fence-heavy games
+FENCE_RATE = 0.2
+DENSE_FENCE_RATE = 0.9
+# Chance a random corpus pawn move follows the shortest path, so games finish
+WALK_BIAS = 0.6
+# Corpus games still running after this many plies are cut off
+MAX_PLIES = 300
+# Timed rounds of each benchmark, the best round is kept
+ROUNDS = 5
+# Fractional slowdown (or memory growth) allowed before compare reports a regression
+THRESHOLD = 0.10
+# Fresh interpreters started to time each cold import, the fastest is kept
+IMPORT_ROUNDS = 5
+# Code timed by the cold import benchmarks: the package alone, and the package with the search engines
+# and tablebase loaded
+CORE_IMPORT = "import quoridor"
+ENGINE_IMPORT = "import quoridor; quoridor.AIPlayer; quoridor.MCTSPlayer; quoridor.Tablebase"
+# Benchmarks where a larger value is worse, every other one is a rate
+LOWER_IS_BETTER = ("peak_memory_kb", "import_core_ms", "import_engines_ms")
+
+
+def corpus_game(rng, fence_rate):
+    """Plays a random legal game
+    Parameters: Random number generator, chance each move is a fence while the player has some left
+    Returns: Move log of the game
+    """
+    game = QuoridorGame(quiet=True)
+    for ply in range(MAX_PLIES):
+        if game.is_game_over():
+            break
+        moves = game.legal_moves()
+        pawn_moves = [move for move in moves if move < PAWN_MOVES]
+        fence_moves = moves[len(pawn_moves):]
+        if fence_moves and rng.random() < fence_rate:
+            move = fence_moves[rng.randrange(len(fence_moves))]
+        elif rng.random() < WALK_BIAS:
+            distances = game.get_distance_field(game.get_current_player_num())
+            move = min(pawn_moves, key=lambda target: (distances[target], rng.random()))
+        else:
+            move = pawn_moves[rng.randrange(len(pawn_moves))]
+        game.apply_move(move)
+    return game.get_moves()
+
+
+def build_state(square1, square2, fences=(), current=1):
+    """Packs a hand-made position for the standard game
+    Parameters: Squares of the two pawns, fences as (direction, (x, y)) pairs in place_fence notation,
+    number of the player to move
+    Returns: Tuple in the format of QuoridorGame.to_state
+    """
+    # Starts from the fences a new game places along the edges of the board
+    h_fences, v_fences = QuoridorGame(quiet=True).to_state()[1:3]
+    for fence in fences:
+        direction, bit = FENCE_SLOTS[FENCE_SLOT_LOOKUP[fence]][:2]
+        if direction == "h":
+            h_fences |= bit
+        else:
+            v_fences |= bit
+    return square1 | square2 << PAWN_BITS, h_fences, v_fences, STARTING_FENCES, STARTING_FENCES, current, 0
+
+
+def adversarial_states():
+    """Lists hand-made positions that reach the deepest branches of the pawn rules
+    Parameters: None
+    Returns: List of states in the format of QuoridorGame.to_state
+    """
+    middle = (BOARD_SIZE // 2) * BOARD_SIZE + BOARD_SIZE // 2
+    below = middle + BOARD_SIZE
+    right = middle + 1
+    return [
+        # Pawns facing each other, for straight jumps either way
+        build_state(middle, below),
+        build_state(middle, below, current=2),
+        build_state(middle, right),
+        # A fence behind the facing pawn turns the jump into a choice of diagonals
+        build_state(middle, below, [("h", (4, 6))]),
+        build_state(middle, below, [("h", (4, 4))], current=2),
+        build_state(middle, right, [("v", (6, 4))]),
+        # Fenced on one side as well, so only one diagonal is left
+        build_state(middle, below, [("h", (4, 6)), ("v", (4, 5))]),
+        build_state(middle, right, [("v", (6, 4)), ("h", (5, 4))]),
+        # Boxed into a corridor facing each other
+        build_state(middle, below, [("v", (4, 4)), ("v", (5, 4)), ("v", (4, 5)), ("v", (5, 5)),
+                                    ("v", (4, 6)), ("v", (5, 6))]),
+        # Facing each other on the edge of the board
+        build_state(BOARD_SIZE, 2 * BOARD_SIZE, [("h", (0, 3))]),
+    ]
+
+
+def build_corpus(seed=CORPUS_SEED, games=CORPUS_GAMES, dense_games=DENSE_GAMES):
+    """Builds the benchmark corpus
+    Parameters: Random seed, number of normal and of fence-heavy random games
+    Returns: Dict with "games", the move logs of every game, and "states", positions taken along
+    the games plus the hand-made adversarial positions
+    """
+    rng = random.Random(seed)
+    logs = [corpus_game(rng, FENCE_RATE) for game in range(games)]
+    logs.extend(corpus_game(rng, DENSE_FENCE_RATE) for game in range(dense_games))
+    states = []
+    for moves in logs:
+        game = QuoridorGame(quiet=True)
+        for ply, move in enumerate(moves):
+            if ply % POSITION_STRIDE == 0:
+                states.append(game.to_state())
+            game.apply_move(move)
+            if game.is_game_over():
+                break
+    states.extend(adversarial_states())
+    return {"games": logs, "states": states}
+
+
+def pawn_probes(game):
+    """Lists the pawn moves worth validating in a position
+    Parameters: QuoridorGame object
+    Returns: List of (target, current) positions in (row, col) notation: every square on the board
+    within two rows and columns of the pawn to move
+    """
+    row, col = game.lookup_player(game.get_current_player_num()).get_pawn().get_pos()
+    return [((target_row, target_col), (row, col))
+            for target_row in range(max(row - 2, 0), min(row + 3, BOARD_SIZE))
+            for target_col in range(max(col - 2, 0), min(col + 3, BOARD_SIZE))
+            if (target_row, target_col) != (row, col)]
+
+
+def best_rate(run, rounds=ROUNDS):
+    """Times a benchmark and keeps its fastest round
+    Parameters: Function running one round and returning the number of operations it made, rounds to run
+    Returns: Operations per second of the fastest round
+    """
+    best = 0.0
+    for round_number in range(rounds):
+        start = time.perf_counter()
+        count = run()
+        seconds = time.perf_counter() - start
+        if seconds > 0:
+            best = max(best, count / seconds)
+    return best
+
+
+def bench_rule_checks(games):
+    """Benchmarks validate_movement, collision_check and check_jump on their own
+    Parameters: List of quiet QuoridorGame objects
+    Returns: Checks per second
+    """
+    probes = [(game, pawn_probes(game)) for game in games]
+
+    def run():
+        count = 0
+        for game, moves in probes:
+            for pos, current_pos in moves:
+                game.collision_check(pos, current_pos)
+                game.validate_movement(pos, current_pos)
+                count += 2
+                if pos[0] == current_pos[0] or pos[1] == current_pos[1]:
+                    if abs(pos[0] - current_pos[0]) == 2 or abs(pos[1] - current_pos[1]) == 2:
+                        game.check_jump(pos, current_pos)
+                        count += 1
+        return count
+    return best_rate(run)
+
+
+def bench_pawn_validations(games):
+    """Benchmarks the full rule check move_pawn runs, without making the moves
+    Parameters: List of quiet QuoridorGame objects
+    Returns: Pawn moves validated per second
+    """
+    probes = [(game, game.get_current_player_num(), [(pos[1], pos[0]) for pos, current_pos in pawn_probes(game)])
+              for game in games]
+
+    def run():
+        count = 0
+        for game, player_num, targets in probes:
+            for raw_pos in targets:
+                game.validate_pawn_move(player_num, raw_pos)
+            count += len(targets)
+        return count
+    return best_rate(run)
+
+
+def bench_fence_validations(games):
+    """Benchmarks the full rule check place_fence runs, including the path check, on every fence cell
+    Parameters: List of quiet QuoridorGame objects
+    Returns: Fences validated per second
+    """
+    fences = [(slot[0], slot[2]) for slot in FENCE_SLOTS]
+    probes = [(game, game.get_current_player_num()) for game in games]
+
+    def run():
+        for game, player_num in probes:
+            for direction, raw_pos in fences:
+                game.validate_fence(player_num, direction, raw_pos)
+        return len(probes) * len(fences)
+    return best_rate(run)
+
+
+def bench_legal_moves(games):
+    """Benchmarks legal move generation
+    Parameters: List of quiet QuoridorGame objects
+    Returns: Move lists generated per second
+    """
+    def run():
+        for game in games:
+            game.legal_moves()
+        return len(games)
+    return best_rate(run)
+
+
+def play_games(logs):
+    """Replays games through play, validating every move like a person's
+    Parameters: List of move logs
+    Returns: Number of games played
+    """
+    for moves in logs:
+        game = QuoridorGame(quiet=True)
+        for move in moves:
+            game.play(move)
+    return len(logs)
+
+
+def bench_games(logs):
+    """Benchmarks full games played through move_pawn and place_fence
+    Parameters: List of move logs
+    Returns: Games per second
+    """
+    return best_rate(lambda: play_games(logs))
+
+
+def peak_memory(logs):
+    """Measures the peak memory allocated while replaying games
+    Parameters: List of move logs
+    Returns: Peak allocation in kilobytes
+    """
+    tracemalloc.start()
+    try:
+        play_games(logs)
+        return tracemalloc.get_traced_memory()[1] / 1024
+    finally:
+        tracemalloc.stop()
+
+
+def cold_import_ms(code, rounds=IMPORT_ROUNDS):
+    """Times imports in a fresh interpreter, so nothing is already loaded
+    Parameters: Python statements doing the imports, number of interpreters to start
+    Returns: Milliseconds of the fastest run, not counting the interpreter's own startup
+    """
+    timer = "import time\nstart = time.perf_counter()\n%s\nprint(time.perf_counter() - start)"
+    best = None
+    for round_number in range(rounds):
+        output = subprocess.run([sys.executable, "-c", timer % code.replace("; ", "\n")], capture_output=True,
+                                text=True, check=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout
+        seconds = float(output.split()[-1])
+        if best is None or seconds < best:
+            best = seconds
+    return best * 1000
+
+
+def run_benchmarks(corpus=None):
+    """Runs every benchmark on the corpus
+    Parameters: Corpus from build_corpus, the default corpus if None
+    Returns: Dict ready to be written as JSON, with the Python version, corpus size and "results",
+    a dict of benchmark name to value
+    """
+    if corpus is None:
+        corpus = build_corpus()
+    games = [QuoridorGame.from_state(state, quiet=True) for state in corpus["states"]]
+    results = {"rule_checks_per_s": bench_rule_checks(games),
+               "pawn_validations_per_s": bench_pawn_validations(games),
+               "fence_validations_per_s": bench_fence_validations(games),
+               "legal_moves_per_s": bench_legal_moves(games),
+               "games_per_s": bench_games(corpus["games"]),
+               "peak_memory_kb": peak_memory(corpus["games"]),
+               "import_core_ms": cold_import_ms(CORE_IMPORT),
+               "import_engines_ms": cold_import_ms(ENGINE_IMPORT)}
+    return {"version": RESULT_VERSION, "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "corpus": {"seed": CORPUS_SEED, "games": len(corpus["games"]), "positions": len(corpus["states"])},
+            "results": results}
+
+
+def compare(baseline, current, threshold=THRESHOLD):
+    """Compares two benchmark results
+    Parameters: Dicts from run_benchmarks (or their JSON), fractional change allowed
+    Returns: List of (name, baseline value, current value, fractional change) for each benchmark
+    that got worse by more than the threshold
+    Raises: ValueError if the results were written in another format
+    """
+    if baseline.get("version") != RESULT_VERSION or current.get("version") != RESULT_VERSION:
+        raise ValueError("Benchmark results must both be version " + str(RESULT_VERSION))
+    regressions = []
+    for name, old in baseline["results"].items():
+        new = current["results"].get(name)
+        if new is None or old <= 0:
+            continue
+        change = (new - old) / old
+        worse = change > threshold if name in LOWER_IS_BETTER else change < -threshold
+        if worse:
+            regressions.append((name, old, new, change))
+    return regressions
+
+
+if __name__ == "__main__":
+    # Usage: QuoridorBench.py run [result file]
+    #        QuoridorBench.py compare <baseline file> <result file> [threshold]
+    # compare exits with status 1 if anything regressed past the threshold
+    if len(sys.argv) > 1 and sys.argv[1] == "compare":
+        with open(sys.argv[2]) as file:
+            baseline = json.load(file)
+        with open(sys.argv[3]) as file:
+            current = json.load(file)
+        regressions = compare(baseline, current, float(sys.argv[4]) if len(sys.argv) > 4 else THRESHOLD)
+        for name, old, new, change in regressions:
+            print(name + ": " + format(old, ".1f") + " -> " + format(new, ".1f") + " (" + format(change, "+.1%") + ")")
+        sys.exit(1 if regressions else 0)
+    result = json.dumps(run_benchmarks(), indent=2)
+    if len(sys.argv) > 2:
+        with open(sys.argv[2], "w") as file:
+            file.write(result + "\n")
+    else:
+        print(result)
@@ -0,0 +1,337 @@
+import mmap
+import os
+import struct
+import sys
+from collections import deque
+
+from Quoridor import QuoridorGame, BOARD_SIZE, GOAL_ROWS, PAWN_BITS, ZOBRIST_PAWNS, ZOBRIST_TURNS, \
+    DEFAULT_TABLES, pawn_targets
+from QuoridorRecord import RecordReader
+
+# Bytes every table file starts with: a magic string, the kind of table, and padding to 8 bytes
+MAGIC = b"QTBL"
+BOOK = 1
+TABLEBASE = 2
+HEADER_FORMAT = struct.Struct("<4sB3x")
+# Entries are a 64-bit position key followed by the value, sorted by key
+KEY_FORMAT = struct.Struct("<Q")
+# Book values: best move, games it was played in, games it won
+BOOK_FORMAT = struct.Struct("<QHII")
+# Tablebase values: best move, result for the player to move (WIN/DRAW/LOSS), plies to the end
+TABLEBASE_FORMAT = struct.Struct("<QHbB")
+ENTRY_FORMATS = {BOOK: BOOK_FORMAT, TABLEBASE: TABLEBASE_FORMAT}
+# Results stored in the tablebase, and the move stored when there is none
+WIN = 1
+DRAW = 0
+LOSS = -1
+NO_MOVE = 0xFFFF
+# Plies of each game the opening book is built from
+BOOK_PLIES = 12
+SQUARES = BOARD_SIZE * BOARD_SIZE
+
+
+class SortedTable:
+    """Read-only table of fixed-size entries sorted by position key
+    The file is memory mapped and searched in place, so any number of processes can share it
+    without loading it into memory
+    """
+    def __init__(self, path, kind):
+        """Initializes a SortedTable
+        Parameters: Path of the table file, BOOK or TABLEBASE
+        Returns: None
+        Raises: ValueError if the file isn't a table of that kind
+        """
+        self._entry = ENTRY_FORMATS[kind]
+        self._file = open(path, "rb")
+        self._map = None
+        size = os.fstat(self._file.fileno()).st_size
+        if size >= HEADER_FORMAT.size:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._map is None or HEADER_FORMAT.unpack_from(self._map) != (MAGIC, kind) \
+                or (size - HEADER_FORMAT.size) % self._entry.size:
+            self.close()
+            raise ValueError("Not a Quoridor table of kind " + str(kind) + ": " + str(path))
+        self._count = (size - HEADER_FORMAT.size) // self._entry.size
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __len__(self):
+        return self._count
+
+    def lookup(self, key):
+        """Binary searches the table for a position key
+        Parameters: 64-bit position key
+        Returns: Tuple of the entry's values without the key, or None if the key isn't stored
+        """
+        low = 0
+        high = self._count
+        size = self._entry.size
+        while low < high:
+            middle = (low + high) // 2
+            stored = KEY_FORMAT.unpack_from(self._map, HEADER_FORMAT.size + middle * size)[0]
+            if stored < key:
+                low = middle + 1
+            elif stored > key:
+                high = middle
+            else:
+                return self._entry.unpack_from(self._map, HEADER_FORMAT.size + middle * size)[1:]
+        return None
+
+    def close(self):
+        """Releases the memory map and closes the file
+        Parameters: None
+        Returns: None
+        """
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        if not self._file.closed:
+            self._file.close()
+
+
+def write_table(path, kind, entries):
+    """Writes a table file
+    Parameters: Path of the file, BOOK or TABLEBASE, dict of position key to value tuple
+    Returns: Number of entries written
+    """
+    entry = ENTRY_FORMATS[kind]
+    with open(path, "wb") as table:
+        table.write(HEADER_FORMAT.pack(MAGIC, kind))
+        for key in sorted(entries):
+            table.write(entry.pack(key, *entries[key]))
+    return len(entries)
+
+
+class OpeningBookBuilder:
+    """Collects opening moves from finished games and search results"""
+    def __init__(self, plies=BOOK_PLIES):
+        """Initializes an OpeningBookBuilder
+        Parameters: Number of plies at the start of each game to collect
+        Returns: None
+        """
+        self._plies = plies
+        # (position key, move) -> [games, wins]
+        self._stats = {}
+
+    def add_game(self, moves):
+        """Adds the opening of a finished game
+        Parameters: Move log of the game (see QuoridorGame.get_moves)
+        Returns: None
+        Note: Each move counts as won if the player who made it went on to win. Undecided games
+        count as played but not won
+        """
+        game = QuoridorGame(quiet=True)
+        played = []
+        for ply, move in enumerate(moves):
+            if ply < self._plies:
+                played.append((game.get_key(), game.get_current_player_num(), move))
+            game.apply_move(move)
+        for key, player_num, move in played:
+            self.add_result(key, move, 1, 1 if game.is_winner(player_num) else 0)
+
+    def add_result(self, key, move, games=1, wins=1):
+        """Adds a move chosen for a position, such as the result of a search
+        Parameters: Position key, move code, number of games to count it as, number of those won
+        Returns: None
+        """
+        stats = self._stats.setdefault((key, move), [0, 0])
+        stats[0] += games
+        stats[1] += wins
+
+    def write(self, path, min_games=1):
+        """Writes the book
+        Parameters: Path of the book file, games a move needs before it can be chosen
+        Returns: Number of positions written
+        Note: Each position keeps the move with the best win rate, breaking ties by games played
+        """
+        best = {}
+        for (key, move), (games, wins) in self._stats.items():
+            if games < min_games:
+                continue
+            current = best.get(key)
+            if current is None or (wins * current[1], games) > (current[2] * games, current[1]):
+                best[key] = (move, games, wins)
+        return write_table(path, BOOK, best)
+
+
+class OpeningBook:
+    """Memory-mapped opening book"""
+    def __init__(self, path):
+        """Initializes an OpeningBook
+        Parameters: Path of a file written by OpeningBookBuilder
+        Returns: None
+        """
+        self._table = SortedTable(path, BOOK)
+
+    def probe(self, game):
+        """Looks up the book move for the game's position
+        Parameters: QuoridorGame object
+        Returns: (move, games, wins), or None if the position isn't in the book
+        Note: Books only hold positions of the standard game, so other configurations are never found
+        """
+        if game.get_tables() is not DEFAULT_TABLES:
+            return None
+        return self._table.lookup(game.get_key())
+
+    def close(self):
+        """Closes the book
+        Parameters: None
+        Returns: None
+        """
+        self._table.close()
+
+
+def solve_layout(h_fences, v_fences):
+    """Solves every pawn race on one fence layout by retrograde analysis
+    Parameters: Horizontal and vertical fence masks (see QuoridorGame.to_state)
+    Returns: Dict of position key to (move, result, plies) for every position with both pawns
+    off their goal rows, both players out of fences, and either player to move
+    Note: Positions are resolved outwards from the finished games, so winners take the fastest
+    win and losers the slowest loss. Positions that can't be resolved are draws
+    """
+    game = QuoridorGame.from_state(((SQUARES - 1) << PAWN_BITS, h_fences, v_fences, 0, 0, 1, 0), quiet=True)
+    open_edges = game.get_open_edges()
+    # Key of the layout with no pawns, player one to move and no fences left
+    base = game.get_key() ^ ZOBRIST_PAWNS[0][0] ^ ZOBRIST_PAWNS[1][SQUARES - 1]
+    turn_change = ZOBRIST_TURNS[0] ^ ZOBRIST_TURNS[1]
+    # Positions are numbered by player to move, then player one's square, then player two's square
+    total = 2 * SQUARES * SQUARES
+    result = [None] * total
+    plies = [0] * total
+    children = [()] * total
+    parents = [[] for position in range(total)]
+    remaining = [0] * total
+    queue = deque()
+    for position in range(total):
+        index, squares = divmod(position, SQUARES * SQUARES)
+        square1, square2 = divmod(squares, SQUARES)
+        if square1 == square2:
+            continue
+        if square1 // BOARD_SIZE == GOAL_ROWS[0] or square2 // BOARD_SIZE == GOAL_ROWS[1]:
+            # The game is over, and the player to move has lost unless their own pawn is the one home
+            home = (square1, square2)[index] // BOARD_SIZE == GOAL_ROWS[index]
+            result[position] = WIN if home else LOSS
+            queue.append(position)
+            continue
+        if index == 0:
+            moves = [(target, (SQUARES + target) * SQUARES + square2)
+                     for target in pawn_targets(open_edges, 1 << square1 | 1 << square2, square1)]
+        else:
+            moves = [(target, square1 * SQUARES + target)
+                     for target in pawn_targets(open_edges, 1 << square1 | 1 << square2, square2)]
+        children[position] = moves
+        remaining[position] = len(moves)
+        for target, child in moves:
+            parents[child].append(position)
+    # Resolves positions in order of distance from the end of the game
+    while queue:
+        child = queue.popleft()
+        for parent in parents[child]:
+            if result[parent] is not None:
+                continue
+            if result[child] == LOSS:
+                result[parent] = WIN
+            else:
+                remaining[parent] -= 1
+                if remaining[parent]:
+                    continue
+                result[parent] = LOSS
+            plies[parent] = plies[child] + 1
+            queue.append(parent)
+    entries = {}
+    for position in range(total):
+        if not children[position]:
+            continue
+        index, squares = divmod(position, SQUARES * SQUARES)
+        square1, square2 = divmod(squares, SQUARES)
+        outcome = result[position] if result[position] is not None else DRAW
+        # Winners head for the quickest loss of the opponent, losers for the slowest win, and draws
+        # for another draw
+        best_move = NO_MOVE
+        best_plies = 0
+        for target, child in children[position]:
+            if (result[child] if result[child] is not None else DRAW) != -outcome:
+                continue
+            if best_move == NO_MOVE \
+                    or (plies[child] < best_plies if outcome == WIN else plies[child] > best_plies):
+                best_move = target
+                best_plies = plies[child]
+        key = base ^ ZOBRIST_PAWNS[0][square1] ^ ZOBRIST_PAWNS[1][square2]
+        if index == 1:
+            key ^= turn_change
+        entries[key] = (best_move, outcome, min(plies[position], 255))
+    return entries
+
+
+def endgame_layouts(records):
+    """Finds the fence layouts games reached once both players ran out of fences
+    Parameters: Iterable of move logs
+    Returns: Set of (horizontal fence mask, vertical fence mask)
+    """
+    layouts = set()
+    for moves in records:
+        game = QuoridorGame(quiet=True)
+        for move in moves:
+            game.apply_move(move)
+            if game.lookup_player(1).get_fences() == 0 and game.lookup_player(2).get_fences() == 0:
+                layouts.add(game.to_state()[1:3])
+                break
+    return layouts
+
+
+def build_tablebase(path, layouts):
+    """Solves fence layouts and writes them to one tablebase file
+    Parameters: Path of the tablebase file, iterable of (horizontal fence mask, vertical fence mask)
+    Returns: Number of positions written
+    """
+    entries = {}
+    for h_fences, v_fences in layouts:
+        entries.update(solve_layout(h_fences, v_fences))
+    return write_table(path, TABLEBASE, entries)
+
+
+class Tablebase:
+    """Memory-mapped endgame tablebase for positions where neither player has fences left"""
+    def __init__(self, path):
+        """Initializes a Tablebase
+        Parameters: Path of a file written by build_tablebase
+        Returns: None
+        """
+        self._table = SortedTable(path, TABLEBASE)
+
+    def probe(self, game):
+        """Looks up the game's position
+        Parameters: QuoridorGame object
+        Returns: (move, result, plies) with the move as a move code, result as WIN/DRAW/LOSS for the
+        player to move and plies to the end of the game, or None if the position isn't stored
+        Note: Tablebases only hold positions of the standard game, so other configurations are never found
+        """
+        if game.get_tables() is not DEFAULT_TABLES:
+            return None
+        if game.lookup_player(1).get_fences() or game.lookup_player(2).get_fences():
+            return None
+        return self._table.lookup(game.get_key())
+
+    def close(self):
+        """Closes the tablebase
+        Parameters: None
+        Returns: None
+        """
+        self._table.close()
+
+
+if __name__ == "__main__":
+    # Usage: QuoridorBook.py book|tablebase <record file> <table file>
+    kind, source, target = sys.argv[1:4]
+    with RecordReader(source) as reader:
+        if kind == "book":
+            builder = OpeningBookBuilder()
+            for moves in reader:
+                builder.add_game(moves)
+            print(builder.write(target))
+        else:
+            print(build_tablebase(target, endgame_layouts(reader)))
@@ -0,0 +1,289 @@
+import math
+import multiprocessing
+import os
+import random
+import time
+
+from Quoridor import QuoridorGame
+from DistanceCache import SharedDistanceCache
+
+# Exploration constant of the UCT formula
+EXPLORATION = 1.4
+# Chance a rollout move follows the shortest path, and chance it places a fence instead
+WALK_BIAS = 0.7
+FENCE_RATE = 0.15
+# Rollouts longer than this are scored by shortest-path distance instead of being played out
+MAX_ROLLOUT_PLIES = 200
+# Shared distance caches attached by this process, by segment name
+ATTACHED_CACHES = {}
+
+
+class MCTSNode:
+    """One position in a Monte Carlo search tree
+    Stores the move that led to it, its visit count, and the wins of the player who made that move
+    """
+    def __init__(self, move, parent, player_num, moves):
+        """Initializes an MCTSNode
+        Parameters: Move code leading to the node, parent node, number of the player who made the move,
+        move codes still to be expanded from the node
+        Returns: None
+        """
+        self.move = move
+        self.parent = parent
+        self.player_num = player_num
+        self.untried = moves
+        self.children = []
+        self.visits = 0
+        self.wins = 0.0
+
+    def select_child(self):
+        """Picks the child with the best UCT score
+        Parameters: None
+        Returns: The chosen child node
+        """
+        log_visits = math.log(self.visits)
+        best = None
+        best_score = -1.0
+        for child in self.children:
+            score = child.wins / child.visits + EXPLORATION * math.sqrt(log_visits / child.visits)
+            if score > best_score:
+                best = child
+                best_score = score
+        return best
+
+
+def tree_moves(game):
+    """Lists the moves expanded in the tree for the player to move
+    Parameters: QuoridorGame object
+    Returns: Move codes of every pawn move and of every legal fence bordering the opponent's shortest path
+    Note: Fences away from the opponent's path are left to the rollouts to keep the tree narrow
+    """
+    player_num = game.get_current_player_num()
+    if game.lookup_player(player_num).get_fences() < 1:
+        return game.legal_moves(())
+    square_slots = game.get_tables().square_slots
+    slots = set()
+    for square in game.shortest_path(3 - player_num):
+        slots.update(square_slots[square])
+    return game.legal_moves(sorted(slots))
+
+
+def rollout_move(game, rng):
+    """Picks a quick move for the player to move during a rollout
+    Parameters: QuoridorGame object, random number generator
+    Returns: A move code, or None if the player has no legal move
+    Note: Mostly walks the pawn along its shortest path, sometimes places a fence on the opponent's
+    shortest path, and otherwise makes a random pawn move
+    """
+    player_num = game.get_current_player_num()
+    if game.lookup_player(player_num).get_fences() > 0 and rng.random() < FENCE_RATE:
+        tables = game.get_tables()
+        path = game.shortest_path(3 - player_num)
+        slots = game.fence_move_slots(tables.square_slots[path[rng.randrange(len(path))]])
+        if slots:
+            return tables.pawn_moves + slots[rng.randrange(len(slots))]
+    moves = game.legal_moves(())
+    if not moves:
+        return None
+    if rng.random() < WALK_BIAS:
+        distances = game.get_distance_field(player_num)
+        return min(moves, key=lambda move: (distances[move], rng.random()))
+    return moves[rng.randrange(len(moves))]
+
+
+def rollout(game, rng):
+    """Plays the position out with the rollout policy and takes the moves back afterwards
+    Parameters: QuoridorGame object, random number generator
+    Returns: Number of the winning player, or 0 for a position that couldn't be decided
+    Note: Rollouts cut off after MAX_ROLLOUT_PLIES go to the player with the shorter distance
+    """
+    plies = 0
+    while not game.is_game_over() and plies < MAX_ROLLOUT_PLIES:
+        move = rollout_move(game, rng)
+        if move is None:
+            break
+        game.push(move)
+        plies += 1
+    if game.is_game_over():
+        winner = 1 if game.is_winner(1) else 2
+    else:
+        distance1 = game.get_distance(1)
+        distance2 = game.get_distance(2)
+        winner = 1 if distance1 < distance2 else 2 if distance2 < distance1 else 0
+    for ply in range(plies):
+        game.pop()
+    return winner
+
+
+def run_search(game, root, rng, seconds, iterations):
+    """Grows a search tree from the game's current position
+    Parameters: QuoridorGame object, root node for that position, random number generator,
+    time budget in seconds, optional iteration budget
+    Returns: The number of iterations run
+    Note: The game is searched in place with push/pop and is left unchanged
+    """
+    deadline = time.perf_counter() + seconds
+    count = 0
+    while (iterations is None or count < iterations) and time.perf_counter() < deadline:
+        node = root
+        depth = 0
+        # Selects down the tree while every move of a node has been tried
+        while not node.untried and node.children:
+            node = node.select_child()
+            game.push(node.move)
+            depth += 1
+        # Expands one untried move
+        if node.untried and not game.is_game_over():
+            move = node.untried.pop(rng.randrange(len(node.untried)))
+            player_num = game.get_current_player_num()
+            game.push(move)
+            depth += 1
+            child = MCTSNode(move, node, player_num, [] if game.is_game_over() else tree_moves(game))
+            node.children.append(child)
+            node = child
+        winner = rollout(game, rng)
+        # Credits the result to every node on the way back up
+        while node is not None:
+            node.visits += 1
+            if winner == 0:
+                node.wins += 0.5
+            elif winner == node.player_num:
+                node.wins += 1.0
+            node = node.parent
+        for ply in range(depth):
+            game.pop()
+        count += 1
+    return count
+
+
+def search_worker(task):
+    """Runs an independent search in a worker process
+    Parameters: Tuple of (QuoridorGame.snapshot of the position, QuoridorGame.get_config of the game,
+    seconds, iterations, random seed, name of a SharedDistanceCache segment or None)
+    Returns: Tuple of (iterations run, list of (move, visits, wins) for each root move, distance cache
+    probes, distance cache hits)
+    Note: Only the snapshot and the statistics cross the process boundary. Each process attaches
+    to the distance cache once and keeps it for later searches
+    """
+    snapshot, config, seconds, iterations, seed, cache_name = task
+    game = QuoridorGame.from_snapshot(snapshot, True, *config)
+    cache = None
+    if cache_name is not None:
+        if cache_name not in ATTACHED_CACHES:
+            ATTACHED_CACHES[cache_name] = SharedDistanceCache(cache_name)
+        cache = ATTACHED_CACHES[cache_name]
+        game.set_distance_cache(cache)
+    # The attached cache counts every search this process has run, only this one's share is returned
+    probes, hits = cache.get_counts() if cache is not None else (0, 0)
+    root = MCTSNode(None, None, 3 - game.get_current_player_num(), tree_moves(game))
+    count = run_search(game, root, random.Random(seed), seconds, iterations)
+    if cache is not None:
+        total_probes, total_hits = cache.get_counts()
+        probes = total_probes - probes
+        hits = total_hits - hits
+    return count, [(child.move, child.visits, child.wins) for child in root.children], probes, hits
+
+
+class MCTSPlayer:
+    """Computer player that picks moves for one player of a QuoridorGame with Monte Carlo tree search
+    Runs root-parallel searches in a pool of worker processes and merges their root statistics
+    into one tree, then plays the most visited move through move_pawn/place_fence
+    """
+    def __init__(self, player_num, time_limit=1.0, iterations=None, processes=None, seed=None,
+                 distance_cache=None):
+        """Initializes an MCTSPlayer
+        Parameters: Integer associated with the player to move for, seconds allowed per move,
+        optional iteration budget per worker, number of worker processes (every core by default,
+        1 searches in this process), random seed, optional SharedDistanceCache every worker shares
+        the distance fields of fence layouts through
+        Returns: None
+        """
+        self._distance_cache = distance_cache
+        self._player_num = player_num
+        self._time_limit = time_limit
+        self._iterations = iterations
+        self._processes = processes or os.cpu_count() or 1
+        self._rng = random.Random(seed)
+        self._pool = None
+        self._root = None
+        self._stats = {}
+
+    def close(self):
+        """Shuts down the worker pool
+        Parameters: None
+        Returns: None
+        """
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+
+    def get_stats(self):
+        """Returns statistics about the last search
+        Parameters: None
+        Returns: Dict with the chosen move, its visits and win rate, total iterations, seconds taken,
+        iterations per second, and the distance cache probes, hits and hit rate of every worker
+        """
+        return dict(self._stats)
+
+    def play(self, game):
+        """Chooses a move and plays it on the game
+        Parameters: QuoridorGame object
+        Returns: True if a move was played / False if it isn't this player's turn or the game is over
+        """
+        move = self.choose_move(game)
+        if move is None:
+            return False
+        return game.play(move)
+
+    def choose_move(self, game):
+        """Searches the game for the best move within the time budget
+        Parameters: QuoridorGame object
+        Returns: Move code (see QuoridorGame.legal_moves), or None if it isn't this player's turn
+        or the game is over
+        Raises: ValueError for a game with more than two players
+        """
+        if game.get_config()[1] != 2:
+            raise ValueError("MCTSPlayer only plays two player games")
+        if game.is_game_over() or game.get_current_player_num() != self._player_num:
+            return None
+        start = time.perf_counter()
+        snapshot = game.snapshot()
+        config = game.get_config()
+        cache_name = self._distance_cache.get_name() if self._distance_cache is not None else None
+        tasks = [(snapshot, config, self._time_limit, self._iterations, self._rng.getrandbits(32), cache_name)
+                 for worker in range(self._processes)]
+        if self._processes == 1:
+            results = [search_worker(tasks[0])]
+        else:
+            if self._pool is None:
+                self._pool = multiprocessing.Pool(self._processes)
+            results = self._pool.map(search_worker, tasks)
+        # Merges every worker's root statistics into one tree
+        self._root = MCTSNode(None, None, 3 - self._player_num, [])
+        children = {}
+        total = 0
+        probes = 0
+        hits = 0
+        for count, stats, worker_probes, worker_hits in results:
+            total += count
+            probes += worker_probes
+            hits += worker_hits
+            for move, visits, wins in stats:
+                child = children.get(move)
+                if child is None:
+                    child = MCTSNode(move, self._root, self._player_num, [])
+                    children[move] = child
+                    self._root.children.append(child)
+                child.visits += visits
+                child.wins += wins
+                self._root.visits += visits
+        if not self._root.children:
+            return None
+        best = max(self._root.children, key=lambda node: node.visits)
+        seconds = time.perf_counter() - start
+        self._stats = {"move": best.move, "visits": best.visits, "win_rate": best.wins / best.visits,
+                       "iterations": total, "seconds": seconds,
+                       "ips": total / seconds if seconds > 0 else 0.0, "cache_probes": probes,
+                       "cache_hits": hits, "cache_hit_rate": hits / probes if probes else 0.0}
+        return best.move
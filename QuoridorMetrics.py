@@ -0,0 +1,334 @@
+import cProfile
+import functools
+import json
+import os
+import pstats
+import random
+import time
+
+from Quoridor import QuoridorGame, MoveError
+
+# How each instrumented method reports a rejection:
+# REPORTED methods return False and leave the reason in get_last_error, CODE methods return a MoveError,
+# CODE_TUPLE methods return a tuple starting with one, and TIMED methods are only counted and timed
+REPORTED = 0
+CODE = 1
+CODE_TUPLE = 2
+TIMED = 3
+# Methods of QuoridorGame that are instrumented, the moves and every rule check they run
+METHODS = {"move_pawn": REPORTED, "place_fence": REPORTED,
+           "validate_pawn_move": CODE, "validate_fence": CODE,
+           "pawn_move_error": CODE, "fence_error": CODE_TUPLE, "turn_error": CODE,
+           "collision_error": CODE, "movement_error": CODE, "jump_error": CODE,
+           "check_diag": TIMED, "fence_path_changes": TIMED,
+           "validate_turn": REPORTED, "collision_check": REPORTED, "validate_movement": REPORTED,
+           "check_jump": REPORTED}
+# Entry points whose calls may be sampled by the profiler. Rule checks run inside them
+PROFILED = ("move_pawn", "place_fence", "validate_pawn_move", "validate_fence")
+
+
+def error_name(code):
+    """Names a rejection for the histograms
+    Parameters: MoveError code returned by a rule check
+    Returns: Name of the MoveError, or the code as a string if it isn't one
+    """
+    try:
+        return MoveError(code).name
+    except ValueError:
+        return str(code)
+
+
+class MemorySink:
+    """Keeps every flushed set of statistics in a list"""
+    def __init__(self):
+        """Initializes a MemorySink
+        Parameters: None
+        Returns: None
+        """
+        self.records = []
+
+    def write(self, stats):
+        """Stores one set of statistics
+        Parameters: Dict from Instrumentation.get_stats
+        Returns: None
+        """
+        self.records.append(stats)
+
+    def close(self):
+        """Does nothing, the records stay available
+        Parameters: None
+        Returns: None
+        """
+
+
+class JsonLinesSink:
+    """Appends each flushed set of statistics to a file as one line of JSON"""
+    def __init__(self, path):
+        """Initializes a JsonLinesSink
+        Parameters: Path of the file, created if it doesn't exist
+        Returns: None
+        """
+        self._file = open(path, "a")
+
+    def write(self, stats):
+        """Appends one set of statistics, stamped with the time it was written
+        Parameters: Dict from Instrumentation.get_stats
+        Returns: None
+        """
+        self._file.write(json.dumps({"time": time.time(), "methods": stats}) + "\n")
+        self._file.flush()
+
+    def close(self):
+        """Closes the file
+        Parameters: None
+        Returns: None
+        """
+        if not self._file.closed:
+            self._file.close()
+
+
+def prometheus_text(stats):
+    """Formats statistics in the Prometheus text exposition format
+    Parameters: Dict from Instrumentation.get_stats
+    Returns: String of the quoridor_calls_total, quoridor_seconds_total and quoridor_rejections_total metrics
+    """
+    lines = ["# HELP quoridor_calls_total Calls of each QuoridorGame method.",
+             "# TYPE quoridor_calls_total counter"]
+    lines.extend('quoridor_calls_total{method="%s"} %d' % (name, method["calls"])
+                 for name, method in stats.items())
+    lines.append("# HELP quoridor_seconds_total Seconds spent in each QuoridorGame method, including calls it made.")
+    lines.append("# TYPE quoridor_seconds_total counter")
+    lines.extend('quoridor_seconds_total{method="%s"} %.9f' % (name, method["seconds"])
+                 for name, method in stats.items())
+    lines.append("# HELP quoridor_rejections_total Moves and checks rejected by each QuoridorGame method, by reason.")
+    lines.append("# TYPE quoridor_rejections_total counter")
+    for name, method in stats.items():
+        lines.extend('quoridor_rejections_total{method="%s",reason="%s"} %d' % (name, reason, count)
+                     for reason, count in method["rejections"].items())
+    return "\n".join(lines) + "\n"
+
+
+class PrometheusSink:
+    """Rewrites a file with the latest statistics in the Prometheus text format, for a textfile collector"""
+    def __init__(self, path):
+        """Initializes a PrometheusSink
+        Parameters: Path of the file
+        Returns: None
+        """
+        self._path = path
+
+    def write(self, stats):
+        """Replaces the file with the statistics, so readers never see a partial file
+        Parameters: Dict from Instrumentation.get_stats
+        Returns: None
+        """
+        temporary = self._path + ".tmp"
+        with open(temporary, "w") as file:
+            file.write(prometheus_text(stats))
+        os.replace(temporary, self._path)
+
+    def close(self):
+        """Does nothing, the file is complete after every write
+        Parameters: None
+        Returns: None
+        """
+
+
+class Instrumentation:
+    """Counts, times and profiles the hot methods of every QuoridorGame
+    While enabled, the methods in METHODS are replaced on the QuoridorGame class with wrappers that count
+    calls, add up the time spent (including the rule checks each one calls) and tally the MoveError of
+    every rejection. Disabling puts the original methods back, so the game runs at full speed when no
+    instrumentation is enabled. Only one Instrumentation can be enabled at a time
+    """
+    # The Instrumentation currently patched into QuoridorGame
+    _active = None
+
+    def __init__(self, sink=None, methods=None, profile_rate=0.0, seed=None):
+        """Initializes an Instrumentation
+        Parameters: Sink written to by flush (a MemorySink by default), names of the methods to instrument
+        (every method in METHODS by default), chance each call of a PROFILED method is profiled, random seed
+        of the sampling
+        Returns: None
+        """
+        self._sink = sink if sink is not None else MemorySink()
+        self._methods = tuple(methods) if methods is not None else tuple(METHODS)
+        self._originals = {}
+        self._calls = {}
+        self._seconds = {}
+        self._rejections = {}
+        self._profile_rate = profile_rate
+        self._rng = random.Random(seed)
+        self._profiler = None
+        self._profiling = False
+        self._samples = 0
+        self.reset()
+
+    def __enter__(self):
+        self.enable()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.disable()
+
+    def is_enabled(self):
+        """Checks whether the instrumentation is patched into QuoridorGame
+        Parameters: None
+        Returns: True if enabled / False otherwise
+        """
+        return Instrumentation._active is self
+
+    def enable(self):
+        """Patches the instrumented methods into QuoridorGame
+        Parameters: None
+        Returns: None
+        Raises: RuntimeError if another Instrumentation is enabled
+        """
+        if Instrumentation._active is self:
+            return
+        if Instrumentation._active is not None:
+            raise RuntimeError("Another Instrumentation is already enabled")
+        for name in self._methods:
+            original = getattr(QuoridorGame, name)
+            self._originals[name] = original
+            setattr(QuoridorGame, name, self.wrap(name, original))
+        Instrumentation._active = self
+
+    def disable(self):
+        """Puts the original QuoridorGame methods back
+        Parameters: None
+        Returns: None
+        """
+        if Instrumentation._active is not self:
+            return
+        for name, original in self._originals.items():
+            setattr(QuoridorGame, name, original)
+        self._originals = {}
+        Instrumentation._active = None
+
+    def wrap(self, name, method):
+        """Builds the counting and timing wrapper of one method
+        Parameters: Name of the method, the original function
+        Returns: Wrapper function to install on QuoridorGame
+        """
+        kind = METHODS.get(name, TIMED)
+        profiled = name in PROFILED
+        calls = self._calls
+        seconds = self._seconds
+        rejections = self._rejections[name]
+        clock = time.perf_counter
+
+        @functools.wraps(method)
+        def wrapper(game, *args, **kwargs):
+            if profiled and self._profile_rate and not self._profiling and self._rng.random() < self._profile_rate:
+                result, elapsed = self.profile_call(method, game, args, kwargs)
+            else:
+                start = clock()
+                result = method(game, *args, **kwargs)
+                elapsed = clock() - start
+            calls[name] += 1
+            seconds[name] += elapsed
+            # Results that aren't what the kind expects are counted and timed but don't reach a histogram
+            if kind == REPORTED:
+                if not result:
+                    reason = error_name(game.get_last_error())
+                    rejections[reason] = rejections.get(reason, 0) + 1
+            elif kind == CODE or (kind == CODE_TUPLE and isinstance(result, tuple) and result):
+                code = result[0] if kind == CODE_TUPLE else result
+                if isinstance(code, int) and code != MoveError.OK:
+                    reason = error_name(code)
+                    rejections[reason] = rejections.get(reason, 0) + 1
+            return result
+        return wrapper
+
+    def profile_call(self, method, game, args, kwargs):
+        """Runs one sampled call under cProfile
+        Parameters: The original function, the QuoridorGame object, positional and keyword arguments of the call
+        Returns: (result of the call, seconds it took)
+        """
+        if self._profiler is None:
+            self._profiler = cProfile.Profile()
+        start = time.perf_counter()
+        try:
+            self._profiler.enable()
+        except ValueError:
+            # Another profiler is already running, so this call isn't sampled
+            result = method(game, *args, **kwargs)
+            return result, time.perf_counter() - start
+        self._profiling = True
+        try:
+            result = method(game, *args, **kwargs)
+        finally:
+            self._profiler.disable()
+            self._profiling = False
+        self._samples += 1
+        return result, time.perf_counter() - start
+
+    def set_profile_rate(self, rate):
+        """Changes the chance each call of a PROFILED method is profiled, taking effect immediately
+        Parameters: Chance between 0 and 1, 0 stops profiling
+        Returns: None
+        """
+        self._profile_rate = rate
+
+    def get_profile(self):
+        """Returns the profile of every sampled call so far
+        Parameters: None
+        Returns: pstats.Stats object, or None if no call has been sampled
+        """
+        if self._profiler is None or not self._samples:
+            return None
+        return pstats.Stats(self._profiler)
+
+    def get_samples(self):
+        """Returns the number of calls profiled so far
+        Parameters: None
+        Returns: Integer number of calls
+        """
+        return self._samples
+
+    def clear_profile(self):
+        """Drops the profile collected so far
+        Parameters: None
+        Returns: None
+        """
+        self._profiler = None
+        self._samples = 0
+
+    def get_stats(self):
+        """Returns the statistics collected so far
+        Parameters: None
+        Returns: Dict of method name to a dict with "calls", "seconds" spent including the calls it made,
+        and "rejections", a dict of MoveError name to count
+        """
+        return {name: {"calls": self._calls[name], "seconds": self._seconds[name],
+                       "rejections": dict(self._rejections[name])}
+                for name in self._methods}
+
+    def reset(self):
+        """Zeroes the counters, timings and rejection histograms
+        Parameters: None
+        Returns: None
+        Note: The wrappers keep references to the same dicts, so this works while enabled
+        """
+        for name in self._methods:
+            self._calls[name] = 0
+            self._seconds[name] = 0.0
+            self._rejections.setdefault(name, {}).clear()
+
+    def flush(self, reset=False):
+        """Writes the statistics to the sink
+        Parameters: Whether to zero the statistics afterwards
+        Returns: None
+        """
+        self._sink.write(self.get_stats())
+        if reset:
+            self.reset()
+
+    def close(self):
+        """Disables the instrumentation and closes the sink
+        Parameters: None
+        Returns: None
+        """
+        self.disable()
+        self._sink.close()
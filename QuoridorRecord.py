@@ -0,0 +1,194 @@
+import mmap
+import os
+
+from Quoridor import QuoridorGame, PAWN_MOVES, FENCE_SLOTS
+
+# Bytes every record file starts with: a magic string and the format version
+MAGIC = b"QRDR"
+VERSION = 1
+HEADER = MAGIC + bytes([VERSION])
+# Byte marking the end of a game. Move codes stop at PAWN_MOVES + len(FENCE_SLOTS) - 1, well below it
+END_OF_GAME = 0xFF
+END_MARKER = bytes([END_OF_GAME])
+MOVE_CODES = PAWN_MOVES + len(FENCE_SLOTS)
+# Bytes read at a time when searching backwards for the end of the last complete game
+SCAN_BLOCK = 65536
+
+
+def encode_moves(moves):
+    """Encodes a move log as one byte per move
+    Parameters: List of move codes (see QuoridorGame.get_moves)
+    Returns: Bytes of the moves followed by the end of game marker
+    """
+    for move in moves:
+        if not 0 <= move < MOVE_CODES:
+            raise ValueError("Move code out of range: " + str(move))
+    return bytes(moves) + END_MARKER
+
+
+def decode_moves(record):
+    """Decodes the bytes of one game back into a move log
+    Parameters: Bytes of the game, with or without the end of game marker
+    Returns: List of move codes
+    """
+    if record and record[-1] == END_OF_GAME:
+        record = record[:-1]
+    return list(record)
+
+
+def replay(record):
+    """Rebuilds the position reached by a game record
+    Parameters: Move log or encoded bytes of a game
+    Returns: Quiet QuoridorGame object after every move has been played
+    Note: Moves are applied with QuoridorGame.apply_move, which skips validation and printing,
+    so the record has to come from a legal game
+    """
+    game = QuoridorGame(quiet=True)
+    if isinstance(record, (bytes, bytearray, memoryview)):
+        record = decode_moves(bytes(record))
+    for move in record:
+        game.apply_move(move)
+    return game
+
+
+class RecordWriter:
+    """Appends games to a record file
+    The file is a header followed by games written back to back, each one the bytes of its move codes
+    ended by END_OF_GAME, so archives can be extended and read without an index
+    """
+    def __init__(self, path):
+        """Initializes a RecordWriter
+        Parameters: Path of the record file, created with a header if it doesn't exist yet
+        Returns: None
+        Raises: ValueError if the file exists but isn't a record file of this version
+        Note: Bytes of a game a previous writer never finished are cut off, so they can't be read
+        as the start of the next game
+        """
+        try:
+            self._file = open(path, "r+b")
+        except FileNotFoundError:
+            self._file = open(path, "w+b")
+        header = self._file.read(len(HEADER))
+        if header != HEADER[:len(header)]:
+            self._file.close()
+            if header[:len(MAGIC)] != MAGIC[:len(header)]:
+                raise ValueError("Not a Quoridor record file: " + str(path))
+            raise ValueError("Unsupported record version: " + str(header[len(MAGIC)]))
+        self._file.truncate(self.find_end())
+        self._file.seek(0, os.SEEK_END)
+        if self._file.tell() == 0:
+            self._file.write(HEADER)
+        self._games = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def find_end(self):
+        """Finds where the last complete game in the file ends
+        Parameters: None
+        Returns: Offset just after the last END_OF_GAME, the end of the header if no game is complete,
+        or 0 if not even the header was written
+        """
+        position = self._file.seek(0, os.SEEK_END)
+        if position < len(HEADER):
+            return 0
+        while position > len(HEADER):
+            start = max(len(HEADER), position - SCAN_BLOCK)
+            self._file.seek(start)
+            end = self._file.read(position - start).rfind(END_MARKER)
+            if end >= 0:
+                return start + end + 1
+            position = start
+        return len(HEADER)
+
+    def write_game(self, game):
+        """Appends one game to the file
+        Parameters: QuoridorGame object or move log
+        Returns: None
+        """
+        moves = game.get_moves() if isinstance(game, QuoridorGame) else game
+        self._file.write(encode_moves(moves))
+        self._games += 1
+
+    def get_games_written(self):
+        """Returns the number of games written by this writer
+        Parameters: None
+        Returns: Integer number of games
+        """
+        return self._games
+
+    def close(self):
+        """Flushes and closes the file
+        Parameters: None
+        Returns: None
+        """
+        if not self._file.closed:
+            self._file.close()
+
+
+class RecordReader:
+    """Streams the games of a record file through a memory map
+    Games are found by scanning for END_OF_GAME, so only the pages being read are loaded
+    """
+    def __init__(self, path):
+        """Initializes a RecordReader
+        Parameters: Path of the record file
+        Returns: None
+        """
+        self._file = open(path, "rb")
+        self._map = None
+        if os.fstat(self._file.fileno()).st_size > 0:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        size = len(self._map) if self._map is not None else 0
+        if size < len(HEADER) or self._map[:len(MAGIC)] != MAGIC:
+            self.close()
+            raise ValueError("Not a Quoridor record file: " + str(path))
+        if self._map[len(MAGIC)] != VERSION:
+            self.close()
+            raise ValueError("Unsupported record version: " + str(self._map[len(MAGIC)]))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __iter__(self):
+        """Iterates over the games in the file
+        Returns: Move log of each game in order
+        Note: Trailing bytes of a game that was never finished are skipped. RecordWriter cuts them off
+        before appending more games
+        """
+        position = len(HEADER)
+        while True:
+            end = self._map.find(END_MARKER, position)
+            if end < 0:
+                return
+            yield list(self._map[position:end])
+            position = end + 1
+
+    def count(self):
+        """Counts the games in the file
+        Parameters: None
+        Returns: Integer number of complete games
+        """
+        games = 0
+        position = self._map.find(END_MARKER, len(HEADER))
+        while position >= 0:
+            games += 1
+            position = self._map.find(END_MARKER, position + 1)
+        return games
+
+    def close(self):
+        """Releases the memory map and closes the file
+        Parameters: None
+        Returns: None
+        """
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        if not self._file.closed:
+            self._file.close()
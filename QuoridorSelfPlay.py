@@ -0,0 +1,70 @@
+import random
+
+from Quoridor import QuoridorGame, FENCE_SLOTS, PAWN_MOVES
+from quoridor.selfplay import FENCE_RATE, WALK_BIAS, MAX_PLIES, run_batches
+
+# Fence slot covering the edge between each pair of neighbouring squares, in both orders
+EDGE_SLOTS = {}
+for slot_index, fence_slot in enumerate(FENCE_SLOTS):
+    EDGE_SLOTS[fence_slot[3], fence_slot[4]] = slot_index
+    EDGE_SLOTS[fence_slot[4], fence_slot[3]] = slot_index
+
+
+def play_game(rng, max_plies=MAX_PLIES):
+    """Plays one self-play game on a QuoridorGame with the policy of QuoridorBatch.BatchSimulator
+    Parameters: Random number generator, ply limit
+    Returns: Tuple of (winner, 1 or 2, or 0 if the game was cut off or a player had no move; plies played)
+    Note: The player to move either fences the opponent's next shortest-path step, when it has
+    fences left and the fence is legal, or moves its pawn. A player with no pawn move ends the game
+    undecided, as in BatchSimulator
+    """
+    game = QuoridorGame(quiet=True)
+    for ply in range(max_plies):
+        player_num = game.get_current_player_num()
+        index = player_num - 1
+        if game.lookup_player(player_num).get_fences() > 0 and rng.random() < FENCE_RATE:
+            path = game.shortest_path(3 - player_num)
+            if len(path) > 1 and game.fence_move_slots((EDGE_SLOTS[path[0], path[1]],)):
+                game.apply_move(PAWN_MOVES + EDGE_SLOTS[path[0], path[1]])
+                continue
+        targets = game.pawn_move_squares(index)
+        if not targets:
+            return 0, ply
+        if rng.random() < WALK_BIAS:
+            distances = game.get_distance_field(player_num)
+            target = min(targets, key=lambda square: (distances[square], rng.random()))
+        else:
+            target = targets[rng.randrange(len(targets))]
+        game.apply_move(target)
+        if game.is_game_over():
+            return player_num, ply + 1
+    return 0, max_plies
+
+
+def simulate_worker(task):
+    """Plays one batch of games in a worker process
+    Parameters: Tuple of (number of games, random seed, ply limit)
+    Returns: Tuple of (games, wins for player one, wins for player two, total plies)
+    """
+    games, seed, max_plies = task
+    rng = random.Random(seed)
+    wins = [0, 0, 0]
+    plies = 0
+    for game in range(games):
+        winner, played = play_game(rng, max_plies)
+        wins[winner] += 1
+        plies += played
+    return games, wins[1], wins[2], plies
+
+
+def run_selfplay(games, batch_size=1024, processes=None, seed=0, max_plies=MAX_PLIES):
+    """Plays a number of self-play games with this backend, see quoridor.selfplay.run_batches
+    Parameters: Total games, games per batch, worker processes, base random seed, ply limit per game
+    Returns: Dict with games played, wins per player, undecided games, average plies, seconds taken
+    and games per second
+    """
+    return run_batches(simulate_worker, games, batch_size, processes, seed, max_plies)
+
+
+if __name__ == "__main__":
+    print(run_selfplay(1000))
@@ -0,0 +1,352 @@
+import asyncio
+import itertools
+import time
+
+from Quoridor import QuoridorGame, MoveError
+
+# Seconds a game may sit unused before it is evicted to a snapshot, and seconds between eviction sweeps
+IDLE_SECONDS = 300.0
+SWEEP_SECONDS = 30.0
+# Most recent move latencies kept for the statistics
+LATENCY_SAMPLES = 10000
+# Default address the server listens on
+HOST = "127.0.0.1"
+PORT = 8765
+
+
+class GameSession:
+    """One hosted game
+    Holds either the live QuoridorGame or, once evicted, its fixed-size QuoridorGame.snapshot.
+    Every request for the session runs under its own lock, so different games never wait on each other
+    """
+    def __init__(self, game_id):
+        """Initializes a GameSession
+        Parameters: Identifier of the game
+        Returns: None
+        """
+        self.game_id = game_id
+        self.game = QuoridorGame(quiet=True)
+        self.snapshot = None
+        self.config = self.game.get_config()
+        self.lock = asyncio.Lock()
+        self.last_used = time.monotonic()
+
+    def get_game(self):
+        """Returns the live game, restoring it from its snapshot if it was evicted
+        Parameters: None
+        Returns: QuoridorGame object
+        """
+        if self.game is None:
+            self.game = QuoridorGame.from_snapshot(self.snapshot, True, *self.config)
+            self.snapshot = None
+        self.last_used = time.monotonic()
+        return self.game
+
+    def evict(self):
+        """Replaces the live game with its snapshot
+        Parameters: None
+        Returns: None
+        Note: The snapshot's size doesn't grow with the game and restoring it doesn't replay any moves.
+        The move log isn't kept, since no server command reads it
+        """
+        if self.game is not None:
+            self.snapshot = self.game.snapshot()
+            self.game = None
+
+
+class SessionManager:
+    """Hosts many QuoridorGame sessions in one process
+    Commands are the game's own move_pawn, place_fence and is_winner. Requests for the same game are
+    serialized by the game's lock, and idle games are evicted to snapshots and restored on their next request
+    """
+    def __init__(self, idle_seconds=IDLE_SECONDS):
+        """Initializes a SessionManager
+        Parameters: Seconds a game may sit unused before it is evicted
+        Returns: None
+        """
+        self._idle_seconds = idle_seconds
+        self._sessions = {}
+        self._ids = itertools.count(1)
+        self._latencies = []
+        self._moves = 0
+        self._evictions = 0
+
+    def new_game(self):
+        """Starts a new game
+        Parameters: None
+        Returns: Integer identifier of the game
+        """
+        game_id = next(self._ids)
+        self._sessions[game_id] = GameSession(game_id)
+        return game_id
+
+    def end_game(self, game_id):
+        """Stops hosting a game
+        Parameters: Identifier of the game
+        Returns: True if the game was hosted / False otherwise
+        """
+        return self._sessions.pop(game_id, None) is not None
+
+    def get_session(self, game_id):
+        """Looks up a hosted game
+        Parameters: Identifier of the game
+        Returns: GameSession object, or None if no such game is hosted
+        """
+        return self._sessions.get(game_id)
+
+    async def move_pawn(self, game_id, player_num, raw_pos):
+        """Moves a pawn in a hosted game
+        Parameters: Identifier of the game, integer associated with the player, (x, y) position
+        Returns: (MoveError code, message) - MoveError.OK and an empty message if the move was made
+        """
+        return await self.run_move(game_id, lambda game: game.move_pawn(player_num, raw_pos))
+
+    async def place_fence(self, game_id, player_num, direction, raw_pos):
+        """Places a fence in a hosted game
+        Parameters: Identifier of the game, integer associated with the player, 'h' or 'v', (x, y) position
+        Returns: (MoveError code, message) - MoveError.OK and an empty message if the fence was placed
+        """
+        return await self.run_move(game_id, lambda game: game.place_fence(player_num, direction, raw_pos))
+
+    async def is_winner(self, game_id, player_num):
+        """Checks whether a player has won a hosted game
+        Parameters: Identifier of the game, integer associated with the player
+        Returns: True if the player has won / False otherwise
+        """
+        session = self.require_session(game_id)
+        async with session.lock:
+            return session.get_game().is_winner(player_num)
+
+    async def run_move(self, game_id, move):
+        """Runs a move under the game's lock
+        Parameters: Identifier of the game, function making the move on a QuoridorGame
+        Returns: (MoveError code, message) - MoveError.OK and an empty message if the move was made
+        Raises: KeyError if no such game is hosted
+        """
+        session = self.require_session(game_id)
+        async with session.lock:
+            game = session.get_game()
+            if move(game):
+                return MoveError.OK, ""
+            error = game.get_last_error()
+            return error, game.describe_error(error)
+
+    def require_session(self, game_id):
+        """Looks up a hosted game that has to exist
+        Parameters: Identifier of the game
+        Returns: GameSession object
+        Raises: KeyError if no such game is hosted
+        """
+        session = self._sessions.get(game_id)
+        if session is None:
+            raise KeyError(game_id)
+        return session
+
+    def record_latency(self, seconds):
+        """Adds a move latency to the statistics
+        Parameters: Seconds the move took
+        Returns: None
+        """
+        self._moves += 1
+        if len(self._latencies) >= LATENCY_SAMPLES:
+            del self._latencies[:LATENCY_SAMPLES // 2]
+        self._latencies.append(seconds)
+
+    def evict_idle(self):
+        """Evicts every game that has been idle too long and isn't being used
+        Parameters: None
+        Returns: Number of games evicted
+        """
+        cutoff = time.monotonic() - self._idle_seconds
+        evicted = 0
+        for session in self._sessions.values():
+            if session.game is not None and session.last_used < cutoff and not session.lock.locked():
+                session.evict()
+                evicted += 1
+        self._evictions += evicted
+        return evicted
+
+    async def sweep(self, interval=SWEEP_SECONDS):
+        """Evicts idle games periodically until cancelled
+        Parameters: Seconds between sweeps
+        Returns: None
+        """
+        while True:
+            await asyncio.sleep(interval)
+            self.evict_idle()
+
+    def get_stats(self):
+        """Returns statistics about the hosted games and moves
+        Parameters: None
+        Returns: Dict with the number of games, live games, evictions, moves made, and the mean,
+        median, 99th percentile and maximum of the recent move latencies in milliseconds
+        """
+        latencies = sorted(self._latencies)
+        stats = {"games": len(self._sessions),
+                 "live": sum(1 for session in self._sessions.values() if session.game is not None),
+                 "evictions": self._evictions, "moves": self._moves}
+        if latencies:
+            stats["mean_ms"] = sum(latencies) / len(latencies) * 1000
+            stats["p50_ms"] = latencies[len(latencies) // 2] * 1000
+            stats["p99_ms"] = latencies[min(len(latencies) - 1, len(latencies) * 99 // 100)] * 1000
+            stats["max_ms"] = latencies[-1] * 1000
+        return stats
+
+
+class QuoridorServer:
+    """Serves a SessionManager over a line protocol on TCP
+    Each request is one line of space separated words and gets one line back, "OK ..." or "ERR ...":
+        NEW                                 -> OK <game id>
+        MOVE <game id> <player> <x> <y>     -> OK, or ERR <MoveError name> <message>
+        FENCE <game id> <player> <h|v> <x> <y>
+        WINNER <game id> <player>           -> OK 1 if the player has won, OK 0 otherwise
+        END <game id>                       -> OK
+        STATS                               -> OK <name>=<value> ...
+    Moves are timed from the moment their line is read until their reply has been sent
+    """
+    def __init__(self, manager=None):
+        """Initializes a QuoridorServer
+        Parameters: SessionManager to serve, a new one by default
+        Returns: None
+        """
+        self._manager = manager if manager is not None else SessionManager()
+        self._server = None
+        self._sweeper = None
+
+    def get_manager(self):
+        """Returns the served SessionManager
+        Parameters: None
+        Returns: SessionManager object
+        """
+        return self._manager
+
+    async def start(self, host=HOST, port=PORT):
+        """Starts listening and sweeping idle games
+        Parameters: Host and port to listen on, 0 picks a free port
+        Returns: The port being listened on
+        """
+        self._server = await asyncio.start_server(self.handle_client, host, port)
+        self._sweeper = asyncio.ensure_future(self._manager.sweep())
+        return self._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        """Stops listening and sweeping
+        Parameters: None
+        Returns: None
+        """
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            self._sweeper = None
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def handle_client(self, reader, writer):
+        """Answers the requests of one connection until it closes
+        Parameters: asyncio StreamReader and StreamWriter of the connection
+        Returns: None
+        """
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                start = time.perf_counter()
+                words = line.decode("ascii", "replace").split()
+                reply = await self.handle_request(words)
+                writer.write(reply.encode("ascii") + b"\n")
+                await writer.drain()
+                if words and words[0].upper() in ("MOVE", "FENCE"):
+                    self._manager.record_latency(time.perf_counter() - start)
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def handle_request(self, words):
+        """Runs one request
+        Parameters: Words of the request line
+        Returns: The reply line
+        """
+        command = words[0].upper() if words else ""
+        try:
+            if command == "NEW" and len(words) == 1:
+                return "OK " + str(self._manager.new_game())
+            if command == "MOVE" and len(words) == 5:
+                error, message = await self._manager.move_pawn(
+                    int(words[1]), int(words[2]), (int(words[3]), int(words[4])))
+            elif command == "FENCE" and len(words) == 6:
+                error, message = await self._manager.place_fence(
+                    int(words[1]), int(words[2]), words[3], (int(words[4]), int(words[5])))
+            elif command == "WINNER" and len(words) == 3:
+                return "OK 1" if await self._manager.is_winner(int(words[1]), int(words[2])) else "OK 0"
+            elif command == "END" and len(words) == 2:
+                return "OK" if self._manager.end_game(int(words[1])) else "ERR UNKNOWN_GAME"
+            elif command == "STATS" and len(words) == 1:
+                stats = self._manager.get_stats()
+                return "OK " + " ".join(name + "=" + format(value, ".3f" if isinstance(value, float) else "d")
+                                        for name, value in stats.items())
+            else:
+                return "ERR BAD_REQUEST"
+        except ValueError:
+            return "ERR BAD_REQUEST"
+        except KeyError:
+            return "ERR UNKNOWN_GAME"
+        if error == MoveError.OK:
+            return "OK"
+        return "ERR " + error.name + " " + message
+
+
+class QuoridorClient:
+    """Client for a QuoridorServer, one request at a time over one connection"""
+    def __init__(self):
+        """Initializes a QuoridorClient
+        Parameters: None
+        Returns: None
+        """
+        self._reader = None
+        self._writer = None
+
+    async def connect(self, host=HOST, port=PORT):
+        """Opens the connection
+        Parameters: Host and port of the server
+        Returns: None
+        """
+        self._reader, self._writer = await asyncio.open_connection(host, port)
+
+    async def request(self, line):
+        """Sends one request and waits for its reply
+        Parameters: The request line, without a newline
+        Returns: The reply line, without a newline
+        """
+        self._writer.write(line.encode("ascii") + b"\n")
+        await self._writer.drain()
+        return (await self._reader.readline()).decode("ascii").rstrip("\n")
+
+    async def close(self):
+        """Closes the connection
+        Parameters: None
+        Returns: None
+        """
+        if self._writer is not None:
+            self._writer.close()
+            await self._writer.wait_closed()
+            self._writer = None
+
+
+async def serve(host=HOST, port=PORT, idle_seconds=IDLE_SECONDS):
+    """Runs a QuoridorServer until cancelled
+    Parameters: Host and port to listen on, seconds a game may sit unused before it is evicted
+    Returns: None
+    """
+    server = QuoridorServer(SessionManager(idle_seconds))
+    await server.start(host, port)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(serve())
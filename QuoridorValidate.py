@@ -0,0 +1,148 @@
+import json
+import multiprocessing
+import os
+import sys
+from collections import deque
+
+from Quoridor import QuoridorGame
+
+# Games sent to a worker at a time
+CHUNK_SIZE = 256
+# Chunks each worker may have queued before reading more input waits for results
+PENDING_PER_PROCESS = 2
+# Reason given for a record or move that isn't in the expected format
+MALFORMED = "MALFORMED"
+
+
+def is_coordinate(value):
+    """Checks whether a JSON value can be a board coordinate
+    Parameters: Value decoded from a record
+    Returns: True if it is an integer / False otherwise, including for true and false
+    """
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def read_records(path):
+    """Reads game records lazily from a JSON lines file
+    Parameters: Path of the file. Each line is a list of moves, or an object with "moves" and an optional
+    "id". Pawn moves are [x, y] and fences ["h" or "v", x, y], in the notation of move_pawn and place_fence,
+    played in turn order
+    Returns: Generator of (game id, moves) pairs, the id being the line number unless the record names one,
+    and the moves None if the line isn't a record or isn't UTF-8
+    """
+    with open(path, "rb") as file:
+        for line_number, line in enumerate(file, 1):
+            if not line.strip():
+                continue
+            # Lines are decoded one at a time, so a line that isn't UTF-8 only spoils its own record
+            try:
+                record = json.loads(line.decode("utf-8"))
+            except ValueError:
+                yield line_number, None
+                continue
+            if isinstance(record, dict):
+                yield record.get("id", line_number), record.get("moves")
+            else:
+                yield line_number, record
+
+
+def validate_game(record):
+    """Replays one game record through the rule checks of a quiet QuoridorGame
+    Parameters: (game id, moves) pair from read_records
+    Returns: Dict with the game "id", the number of "plies" accepted, and either the "error" (MoveError name,
+    or MALFORMED), "ply" (counting from 0) and "message" of the first illegal move, or the "winner"
+    (player number, 0 if the game is unfinished) when every move was legal
+    """
+    game_id, moves = record
+    game = QuoridorGame(quiet=True)
+    if not isinstance(moves, list):
+        return {"id": game_id, "plies": 0, "error": MALFORMED, "ply": None, "message": "Not a list of moves"}
+    for ply, move in enumerate(moves):
+        player_num = game.get_current_player_num()
+        if isinstance(move, list) and len(move) == 2 and all(is_coordinate(value) for value in move):
+            accepted = game.move_pawn(player_num, tuple(move))
+        elif isinstance(move, list) and len(move) == 3 and isinstance(move[0], str) \
+                and all(is_coordinate(value) for value in move[1:]):
+            accepted = game.place_fence(player_num, move[0], tuple(move[1:]))
+        else:
+            return {"id": game_id, "plies": ply, "error": MALFORMED, "ply": ply, "message": "Unreadable move"}
+        if not accepted:
+            error = game.get_last_error()
+            return {"id": game_id, "plies": ply, "error": error.name, "ply": ply,
+                    "message": game.describe_error(error)}
+    winner = 0
+    for player_num in (1, 2):
+        if game.is_winner(player_num):
+            winner = player_num
+    return {"id": game_id, "plies": len(moves), "winner": winner}
+
+
+def validate_chunk(chunk):
+    """Validates a chunk of game records, in a worker process
+    Parameters: List of (game id, moves) pairs
+    Returns: List of result dicts from validate_game, in the same order
+    """
+    return [validate_game(record) for record in chunk]
+
+
+def chunked(records, size=CHUNK_SIZE):
+    """Groups records into lists without reading ahead of the current chunk
+    Parameters: Iterable of records, records per chunk
+    Returns: Generator of lists of at most size records
+    """
+    chunk = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def validate_records(records, processes=None, chunk_size=CHUNK_SIZE, pending_per_process=PENDING_PER_PROCESS):
+    """Validates a stream of game records on a pool of worker processes
+    Parameters: Iterable of (game id, moves) pairs such as read_records, number of worker processes
+    (every core by default, 1 validates in this process), records per chunk, chunks each worker may
+    have waiting
+    Returns: Generator of result dicts from validate_game, in input order
+    Note: Records are only read while fewer than processes * pending_per_process chunks are in flight,
+    so memory stays flat however long the input is
+    """
+    processes = processes or os.cpu_count() or 1
+    chunks = chunked(records, chunk_size)
+    if processes == 1:
+        for chunk in chunks:
+            yield from validate_chunk(chunk)
+        return
+    limit = processes * pending_per_process
+    with multiprocessing.Pool(processes) as pool:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(pool.apply_async(validate_chunk, (chunk,)))
+            # Waits for the oldest chunk before reading any more input
+            while len(pending) >= limit:
+                yield from pending.popleft().get()
+        while pending:
+            yield from pending.popleft().get()
+
+
+def validate_file(source, target, processes=None):
+    """Validates every record of a JSON lines file and writes one JSON line of results per game
+    Parameters: Path of the records, path of the results file, number of worker processes
+    Returns: Tuple of (games validated, games with an illegal move)
+    """
+    games = 0
+    illegal = 0
+    with open(target, "w") as output:
+        for result in validate_records(read_records(source), processes):
+            games += 1
+            if "error" in result:
+                illegal += 1
+            output.write(json.dumps(result) + "\n")
+    return games, illegal
+
+
+if __name__ == "__main__":
+    # Usage: QuoridorValidate.py <records file> <results file> [processes]
+    print(validate_file(sys.argv[1], sys.argv[2], int(sys.argv[3]) if len(sys.argv) > 3 else None))
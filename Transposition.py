@@ -0,0 +1,110 @@
+from array import array
+
+# Kinds of score stored in the table
+EXACT = 0
+LOWER_BOUND = 1
+UPPER_BOUND = 2
+# Move stored when a position has no best move yet
+NO_MOVE = 0xFFFF
+# Bytes used by one entry: a 64-bit key and a 64-bit packed data word
+ENTRY_BYTES = 16
+# Packed data layout: flag (2 bits), depth (8 bits), generation (6 bits), move (16 bits), score (32 bits)
+DEPTH_SHIFT = 2
+GENERATION_SHIFT = 10
+MOVE_SHIFT = 16
+SCORE_SHIFT = 32
+SCORE_OFFSET = 1 << 31
+
+
+class TranspositionTable:
+    """Bounded table of search results keyed by QuoridorGame position keys
+    Every bucket holds two entries: a depth-preferred entry, which keeps the deepest result of the
+    current search, and an always-replace entry, which takes everything the first one turns down
+    Keys and packed data live in flat 64-bit arrays, so the memory cap is exact
+    """
+    def __init__(self, memory_bytes=16 * 1024 * 1024):
+        """Initializes a TranspositionTable
+        Parameters: Maximum number of bytes the table may use
+        Returns: None
+        Note: The number of buckets is rounded down to a power of two
+        """
+        buckets = 1
+        while buckets * 4 * ENTRY_BYTES <= memory_bytes:
+            buckets *= 2
+        self._mask = buckets - 1
+        self._keys = array("Q", bytes(buckets * 2 * 8))
+        self._data = array("Q", bytes(buckets * 2 * 8))
+        self._generation = 0
+        self._probes = 0
+        self._hits = 0
+
+    def new_search(self):
+        """Marks the start of a new search so results of older searches can be replaced
+        Parameters: None
+        Returns: None
+        """
+        self._generation = (self._generation + 1) & 63
+
+    def clear(self):
+        """Empties the table
+        Parameters: None
+        Returns: None
+        """
+        for index in range(len(self._keys)):
+            self._keys[index] = 0
+            self._data[index] = 0
+        self._probes = 0
+        self._hits = 0
+
+    def probe(self, key):
+        """Looks up the stored result for a position
+        Parameters: Zobrist key of the position
+        Returns: (score, depth, flag, move) tuple, or None if the position isn't stored
+        """
+        self._probes += 1
+        index = (key & self._mask) << 1
+        if self._keys[index] == key:
+            data = self._data[index]
+        elif self._keys[index + 1] == key:
+            data = self._data[index + 1]
+        else:
+            return None
+        self._hits += 1
+        return ((data >> SCORE_SHIFT) - SCORE_OFFSET, (data >> DEPTH_SHIFT) & 0xFF,
+                data & 3, (data >> MOVE_SHIFT) & 0xFFFF)
+
+    def store(self, key, depth, score, flag, move=NO_MOVE):
+        """Stores a search result
+        Parameters: Zobrist key, search depth, score, EXACT/LOWER_BOUND/UPPER_BOUND, best move
+        Returns: None
+        Note: The depth-preferred entry is replaced if it holds the same position, comes from an
+        older search, or was searched less deeply. Otherwise the always-replace entry is used
+        """
+        index = (key & self._mask) << 1
+        data = ((score + SCORE_OFFSET) << SCORE_SHIFT | move << MOVE_SHIFT
+                | self._generation << GENERATION_SHIFT | depth << DEPTH_SHIFT | flag)
+        old = self._data[index]
+        if self._keys[index] == key or self._keys[index] == 0 \
+                or (old >> GENERATION_SHIFT) & 63 != self._generation \
+                or depth >= (old >> DEPTH_SHIFT) & 0xFF:
+            self._keys[index] = key
+            self._data[index] = data
+        else:
+            self._keys[index + 1] = key
+            self._data[index + 1] = data
+
+    def get_memory(self):
+        """Returns the number of bytes held by the table's entries
+        Parameters: None
+        Returns: Size of the key and data arrays in bytes
+        """
+        return (len(self._keys) + len(self._data)) * 8
+
+    def get_hit_rate(self):
+        """Returns the fraction of probes that found their position
+        Parameters: None
+        Returns: Hits divided by probes, or 0.0 before the first probe
+        """
+        if self._probes == 0:
+            return 0.0
+        return self._hits / self._probes
@@ -0,0 +1,62 @@
+import importlib
+
+from Quoridor import QuoridorGame, MoveError, Player, Pawn, PathIndex, BoardTables, get_tables, pawn_targets, \
+    ERROR_MESSAGES, BOARD_SIZE, STARTING_FENCES, FOUR_PLAYER_FENCES
+from quoridor.backends import register_backend, get_backend, available_backends
+
+# Importing the package only loads the rules in Quoridor.py, so short-lived tools that validate a few
+# moves don't pay for the rest. Engines, tablebases, batch simulation, the server and the other tools
+# are imported the first time one of their names is used
+
+# Names loaded on first use, with the module that defines each one
+LAZY_NAMES = {
+    "AIPlayer": "QuoridorAI",
+    "TranspositionTable": "Transposition",
+    "MCTSPlayer": "QuoridorMCTS",
+    "BatchSimulator": "QuoridorBatch",
+    "OpeningBook": "QuoridorBook",
+    "OpeningBookBuilder": "QuoridorBook",
+    "Tablebase": "QuoridorBook",
+    "build_tablebase": "QuoridorBook",
+    "RecordReader": "QuoridorRecord",
+    "RecordWriter": "QuoridorRecord",
+    "encode_moves": "QuoridorRecord",
+    "decode_moves": "QuoridorRecord",
+    "replay": "QuoridorRecord",
+    "SessionManager": "QuoridorServer",
+    "QuoridorServer": "QuoridorServer",
+    "QuoridorClient": "QuoridorServer",
+    "DistanceCache": "DistanceCache",
+    "SharedDistanceCache": "DistanceCache",
+    "Instrumentation": "QuoridorMetrics",
+    "MemorySink": "QuoridorMetrics",
+    "JsonLinesSink": "QuoridorMetrics",
+    "PrometheusSink": "QuoridorMetrics",
+    "validate_records": "QuoridorValidate",
+    "validate_file": "QuoridorValidate",
+    "read_records": "QuoridorValidate",
+    "run_benchmarks": "QuoridorBench",
+}
+
+__all__ = ["QuoridorGame", "MoveError", "Player", "Pawn", "PathIndex", "BoardTables", "get_tables", "pawn_targets",
+           "ERROR_MESSAGES", "BOARD_SIZE", "STARTING_FENCES", "FOUR_PLAYER_FENCES", "register_backend",
+           "get_backend", "available_backends"] + list(LAZY_NAMES)
+
+
+def __getattr__(name):
+    """Imports the module defining a lazily loaded name the first time it is used
+    Parameters: The name looked up on the package
+    Returns: The object it names
+    Raises: AttributeError for names the package doesn't provide
+    """
+    module_name = LAZY_NAMES.get(name)
+    if module_name is None:
+        raise AttributeError("module 'quoridor' has no attribute '" + name + "'")
+    value = getattr(importlib.import_module(module_name), name)
+    # Later lookups find the name directly and skip this function
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(LAZY_NAMES))
@@ -0,0 +1,80 @@
+import importlib
+import os
+
+# Registry of self-play engines. Every backend is a module with a simulate_worker that plays one batch
+# of games with the policy in quoridor.selfplay, and a run_selfplay that runs it through run_batches there.
+# Backends are only imported when they are asked for, and one whose dependencies are missing is skipped
+
+# Backend name -> module implementing it
+BACKENDS = {}
+# Backends tried in order when none is named, fastest first
+PREFERENCE = []
+# Backends imported so far, and the ones that failed to import with the reason
+LOADED = {}
+UNAVAILABLE = {}
+
+
+def register_backend(name, module_name, preferred=False):
+    """Adds a backend to the registry
+    Parameters: Name the backend is asked for by, module implementing it, whether it is tried before the
+    backends already registered when none is named
+    Returns: None
+    """
+    BACKENDS[name] = module_name
+    if name in PREFERENCE:
+        PREFERENCE.remove(name)
+    if preferred:
+        PREFERENCE.insert(0, name)
+    else:
+        PREFERENCE.append(name)
+    LOADED.pop(name, None)
+    UNAVAILABLE.pop(name, None)
+
+
+def load_backend(name):
+    """Imports a backend's module
+    Parameters: Name of the backend
+    Returns: The module, or None if it or one of its dependencies can't be imported
+    Raises: KeyError if no backend has that name
+    """
+    module_name = BACKENDS[name]
+    if name not in LOADED and name not in UNAVAILABLE:
+        try:
+            LOADED[name] = importlib.import_module(module_name)
+        except ImportError as error:
+            UNAVAILABLE[name] = str(error)
+    return LOADED.get(name)
+
+
+def get_backend(name=None):
+    """Returns a self-play engine
+    Parameters: Name of the backend, or None for the first one in PREFERENCE that can be imported.
+    The QUORIDOR_BACKEND environment variable names one when this is None
+    Returns: Module with simulate_worker and run_selfplay
+    Raises: KeyError for an unknown name, ImportError if the backend or every backend can't be imported
+    """
+    if name is None:
+        name = os.environ.get("QUORIDOR_BACKEND") or None
+    if name is not None:
+        backend = load_backend(name)
+        if backend is None:
+            raise ImportError("Backend " + name + " is unavailable: " + UNAVAILABLE[name])
+        return backend
+    for candidate in PREFERENCE:
+        backend = load_backend(candidate)
+        if backend is not None:
+            return backend
+    raise ImportError("No self-play backend can be imported")
+
+
+def available_backends():
+    """Lists the backends that can be imported, importing each one to find out
+    Parameters: None
+    Returns: List of backend names in order of preference
+    """
+    return [name for name in PREFERENCE if load_backend(name) is not None]
+
+
+# The NumPy engine plays whole batches in lockstep, the pure-Python one needs nothing beyond the rules
+register_backend("python", "QuoridorSelfPlay")
+register_backend("array", "QuoridorBatch", preferred=True)
@@ -0,0 +1,41 @@
+import multiprocessing
+import os
+import time
+
+# Self-play policy every backend plays with, so their results can be compared
+# Chance a player with fences left tries to fence the opponent's next step instead of moving
+FENCE_RATE = 0.15
+# Chance a pawn move follows the shortest path instead of being picked at random
+WALK_BIAS = 0.7
+# Games still running after this many plies are recorded as undecided
+MAX_PLIES = 400
+
+
+def run_batches(worker, games, batch_size=1024, processes=None, seed=0, max_plies=MAX_PLIES):
+    """Plays a number of self-play games in batches spread across worker processes
+    Parameters: A backend's simulate_worker, total games, games per batch, worker processes (every core by
+    default, 1 runs in this process), base random seed, ply limit per game
+    Returns: Dict with games played, wins per player, undecided games, average plies, seconds taken
+    and games per second
+    Note: The worker takes a tuple of (number of games, random seed, ply limit) and returns a tuple of
+    (games, wins for player one, wins for player two, total plies). It has to be a module-level function
+    so worker processes can import it
+    """
+    processes = processes or os.cpu_count() or 1
+    tasks = []
+    for start in range(0, games, batch_size):
+        tasks.append((min(batch_size, games - start), seed + len(tasks), max_plies))
+    begin = time.perf_counter()
+    if processes == 1:
+        results = [worker(task) for task in tasks]
+    else:
+        with multiprocessing.Pool(processes) as pool:
+            results = pool.map(worker, tasks)
+    seconds = time.perf_counter() - begin
+    played = sum(result[0] for result in results)
+    wins1 = sum(result[1] for result in results)
+    wins2 = sum(result[2] for result in results)
+    plies = sum(result[3] for result in results)
+    return {"games": played, "wins": [wins1, wins2], "undecided": played - wins1 - wins2,
+            "average_plies": plies / played if played else 0.0, "seconds": seconds,
+            "games_per_sec": played / seconds if seconds > 0 else 0.0}
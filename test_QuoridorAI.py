@@ -0,0 +1,22 @@
+import unittest
+
+from Quoridor import QuoridorGame
+from QuoridorAI import AIPlayer
+
+
+class PawnRaceTest(unittest.TestCase):
+    """With no fences, both players walking straight to their goal rows decides the game"""
+    def test_zero_fence_race_ends(self):
+        game = QuoridorGame(True, 9, 2, 0)
+        players = {player_num: AIPlayer(player_num, time_limit=100, node_limit=5000) for player_num in (1, 2)}
+        # Each ply brings the player to move a step closer, so the race is over within both distances
+        limit = game.get_distance(1) + game.get_distance(2)
+        for ply in range(limit):
+            if game.is_game_over():
+                break
+            self.assertTrue(players[game.get_current_player_num()].play(game))
+        self.assertTrue(game.is_game_over())
+
+
+if __name__ == "__main__":
+    unittest.main()